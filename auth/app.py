@@ -2,7 +2,8 @@ import os
 from server import create_app, config
 
 
-app = create_app(mode=config.Development)
+# Development, Production or Testing
+app = create_app(mode=getattr(config, os.getenv('APP_CONFIG', 'Development')))
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,336 @@
+""" Load test: register/login/validate/post-text mixes at a given concurrency
+
+Run from the `auth` directory. Everything runs on this machine: the auth
+app uses `config.Testing` on a temporary SQLite file and an in-process
+fake memcached (tests/memcached.py).
+
+    python -m benchmarks.load --concurrency 8 --duration 10 --output results.json
+    python -m benchmarks.load --transport http         # through a loopback HTTP server
+    python -m benchmarks.load --target web             # web app in front of auth over HTTP
+    python -m benchmarks.load --set TOKEN_MODE=signed  # override any config value
+    python -m benchmarks.load --compare results.json   # exit 1 on regressions
+
+Workers are threads in one process, so absolute numbers are bounded by the
+GIL. Compare runs made with the same options on the same machine.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from itertools import count
+
+import requests
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+from server import create_app, config
+from server.resources import db
+from tests.memcached import FakeMemcached
+
+WEB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'web')
+PASSWORD = 'Bench-password-1'
+
+
+def percentile(values, q):
+    """ Nearest-rank percentile of an already sorted list """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+class Recorder(object):
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, elapsed) -> dict:
+        def describe(values, errors):
+            values = sorted(values)
+            return {
+                'requests': len(values),
+                'errors': errors,
+                'throughput_rps': round(len(values) / elapsed, 2),
+                'mean_ms': round(sum(values) / len(values) * 1e3, 3) if values else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1e3, 3),
+                'p95_ms': round(percentile(values, 95) * 1e3, 3),
+                'p99_ms': round(percentile(values, 99) * 1e3, 3),
+            }
+
+        endpoints = {name: describe(values, self.errors[name]) for name, values in sorted(self.latencies.items())}
+        everything = [v for values in self.latencies.values() for v in values]
+        return {'endpoints': endpoints, 'total': describe(everything, sum(self.errors.values()))}
+
+
+class AuthDriver(object):
+    """ Speaks the auth JSON API, through the Flask test client or over HTTP """
+
+    expected = {'register': 200, 'login': 200, 'validate': 200, 'text': 200}
+
+    def __init__(self, app, base_url=None):
+        self.app = app
+        self.base_url = base_url
+        self._local = threading.local()
+
+    def _call(self, method, path, body):
+        if self.base_url is None:
+            client = getattr(self._local, 'client', None) or self.app.test_client()
+            self._local.client = client
+            res = client.open('/api' + path, method=method, json=body)
+            return res.status_code, res.get_json(silent=True)
+        session = getattr(self._local, 'session', None) or requests.Session()
+        self._local.session = session
+        res = session.request(method, self.base_url + '/api' + path, json=body)
+        return res.status_code, res.json() if res.content else None
+
+    def register(self, email):
+        status, body = self._call('POST', '/user', {'email': email, 'password': PASSWORD})
+        return status, body and body.get('token')
+
+    def login(self, email):
+        status, body = self._call('POST', '/auth', {'email': email, 'password': PASSWORD})
+        return status, body and body.get('token')
+
+    def validate(self, token):
+        return self._call('GET', '/auth', {'token': token})[0], None
+
+    def text(self, token):
+        return self._call('POST', '/db', {'token': token, 'text': 'benchmark text'})[0], None
+
+
+class WebDriver(object):
+    """ Drives the web app's forms in process, it reaches auth over HTTP """
+
+    expected = {'register': 302, 'login': 302, 'validate': 200, 'text': 200}
+
+    def __init__(self, app):
+        self.app = app
+
+    def _token(self, res):
+        cookie = res.headers.get('Set-Cookie', '')
+        return cookie.split(';', 1)[0].split('=', 1)[1] if cookie.startswith('token=') else None
+
+    def register(self, email):
+        res = self.app.test_client().post('/registration', data={'email': email, 'password': PASSWORD})
+        return res.status_code, self._token(res)
+
+    def login(self, email):
+        res = self.app.test_client().post('/login', data={'email': email, 'password': PASSWORD})
+        return res.status_code, self._token(res)
+
+    def _client(self, token):
+        client = self.app.test_client()
+        client.set_cookie('localhost', 'token', token)
+        return client
+
+    def validate(self, token):
+        return self._client(token).get('/').status_code, None
+
+    def text(self, token):
+        return self._client(token).post('/', data={'text': 'benchmark text'}).status_code, None
+
+
+def parse_mix(spec) -> dict:
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        if name not in AuthDriver.expected:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_overrides(items) -> dict:
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition('=')
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(app):
+    """ Serve ``app`` from a thread on a free loopback port """
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name='bench-http', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def load_web_app(auth_url):
+    os.environ['AUTH_SERVICE_URL'] = auth_url
+    sys.path.insert(0, WEB_DIR)
+    # Loaded by path, `app` on sys.path is the auth service's entry point
+    spec = importlib.util.spec_from_file_location('web_app', os.path.join(WEB_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.app.config['DEBUG'] = False
+    return module.app
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(driver, mix, concurrency, duration, users, seed) -> dict:
+    emails = count()
+    tokens = []
+    seeded = [f'seed{i}@bench.test' for i in range(users)]
+    for email in seeded:
+        status, token = driver.register(email)
+        if token is None:
+            raise SystemExit(f"Could not register seed user {email} (status {status})")
+        tokens.append(token)
+
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            if name == 'register':
+                argument = f'user{index}-{next(emails)}@bench.test'
+            elif name == 'login':
+                argument = rng.choice(seeded)
+            else:
+                argument = rng.choice(tokens)
+            started = time.perf_counter()
+            try:
+                status, token = getattr(driver, name)(argument)
+            except Exception:
+                status, token = None, None
+            recorder.record(name, time.perf_counter() - started, status == driver.expected[name])
+            if token is not None and name == 'register':
+                tokens.append(token)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+def compare(results, baseline, tolerance) -> list:
+    """ Endpoints whose p95 grew or throughput dropped by more than ``tolerance`` """
+    regressions = []
+    for key in ('target', 'transport', 'cache', 'concurrency', 'mix', 'overrides'):
+        if baseline.get('meta', {}).get(key) != results['meta'][key]:
+            print(f"warning: baseline was run with a different {key}")
+    for name, current in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        if before['p95_ms'] and current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if before['throughput_rps'] and current['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--target', choices=('auth', 'web'), default='auth')
+    parser.add_argument('--transport', choices=('inprocess', 'http'), default='inprocess',
+                        help='How requests reach the auth app (the web target always uses http)')
+    parser.add_argument('--cache', choices=('memcached', 'simple'), default='memcached')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load')
+    parser.add_argument('--users', type=int, default=20, help='Users registered before the run')
+    parser.add_argument('--mix', default='register=1,login=2,validate=10,text=3')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='Config override')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    overrides = parse_overrides(args.set)
+    fd, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    memcached = FakeMemcached().start() if args.cache == 'memcached' else None
+    settings = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'}
+    if memcached is not None:
+        settings.update(CACHE_TYPE='memcached', CACHE_MEMCACHED_SERVERS=[memcached.address],
+                        CACHE_KEY_PREFIX='bench')
+    settings.update(overrides)
+    app = create_app(mode=type('Benchmark', (config.Testing,), settings))
+    server = None
+    try:
+        if args.target == 'web' or args.transport == 'http':
+            server, url = serve(app)
+        if args.target == 'web':
+            driver = WebDriver(load_web_app(url))
+        else:
+            driver = AuthDriver(app, url if server else None)
+        results = run(driver, mix, args.concurrency, args.duration, args.users, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        if memcached is not None:
+            memcached.stop()
+        os.remove(path)
+
+    results['meta'] = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'target': args.target,
+        'transport': 'http' if args.target == 'web' else args.transport,
+        'cache': args.cache,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'users': args.users,
+        'mix': mix,
+        'overrides': overrides,
+    }
+
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in list(results['endpoints'].items()) + [('total', results['total'])]:
+        print(f"{name:<10} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>9.1f} "
+              f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
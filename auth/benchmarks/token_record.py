@@ -0,0 +1,39 @@
+""" Compare cached token payloads: pickled ORM User vs binary TokenRecord
+
+Run from the `auth` directory:
+
+    python -m benchmarks.token_record
+"""
+import pickle
+import timeit
+
+from server import create_app, config
+from server.resources import db, user_store
+from server.utils.records import TokenRecord, encode_record, decode_record
+
+NUMBER = 20000
+
+
+def _measure(label, encode, decode):
+    payload = encode()
+    enc = timeit.timeit(encode, number=NUMBER) / NUMBER * 1e6
+    dec = timeit.timeit(lambda: decode(payload), number=NUMBER) / NUMBER * 1e6
+    print(f"{label:<14} {len(payload):>6} B {enc:>10.2f} us {dec:>10.2f} us")
+
+
+def main():
+    app = create_app(mode=config.Testing)
+    with app.app_context():
+        user_store.create_user(email="benchmark@example.com", password="benchmark")
+        user_store.commit()
+        db.session.expunge_all()
+        user = user_store.find_user(email="benchmark@example.com")
+        record = TokenRecord.from_user(user)
+
+        print(f"{'format':<14} {'size':>8} {'encode':>13} {'decode':>13}")
+        _measure("pickle(User)", lambda: pickle.dumps(user, pickle.HIGHEST_PROTOCOL), pickle.loads)
+        _measure("TokenRecord", lambda: encode_record(record), decode_record)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+""" Wire format cost per auth call: JSON vs MessagePack
+
+Run from the `auth` directory:
+
+    python -m benchmarks.wire
+    python -m benchmarks.wire --calls 5000    # more HTTP round trips per format
+
+For each call the web tier makes, serialize and parse are the request and
+response bodies together, with the encoders the web client and the auth
+service use. Bytes are both bodies on the wire. The round trip is GET
+/api/auth against the auth app served over loopback HTTP, which adds
+header parsing, content negotiation and the token lookup to the encoding.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import timeit
+import uuid
+
+import msgpack
+import requests
+
+from benchmarks.load import serve, percentile
+from server import create_app, config
+from server.resources import db
+
+NUMBER = 20000
+MSGPACK = 'application/msgpack'
+
+
+def token():
+    return uuid.uuid4().hex
+
+
+# (request body, response body) of each auth service call
+CALLS = {
+    'validate': ({'token': token()}, {'email': 'someone@example.com', 'expires_at': 1767225600}),
+    'login': ({'email': 'someone@example.com', 'password': 'correct horse battery'},
+              {'token': token(), 'expires_at': 1767225600}),
+    'text': ({'text': 'lorem ipsum dolor sit amet ' * 8, 'token': token()}, {'status': 'successful'}),
+    'batch': ({'tokens': [token() for _ in range(100)]},
+              {'results': [{'token': token(), 'valid': True, 'email': f'user{i}@example.com',
+                            'expires_at': 1767225600} for i in range(100)]}),
+}
+
+FORMATS = {
+    'json': (lambda body: json.dumps(body).encode('utf-8'), json.loads),
+    'msgpack': (lambda body: msgpack.packb(body, use_bin_type=True), lambda data: msgpack.unpackb(data, raw=False)),
+}
+
+
+def encoding():
+    print(f"{'call':<9} {'format':<8} {'bytes':>7} {'serialize us':>13} {'parse us':>9}")
+    for name, bodies in CALLS.items():
+        for label, (dumps, loads) in FORMATS.items():
+            packed = [dumps(body) for body in bodies]
+            serialize = timeit.timeit(lambda: [dumps(body) for body in bodies], number=NUMBER) / NUMBER * 1e6
+            parse = timeit.timeit(lambda: [loads(data) for data in packed], number=NUMBER) / NUMBER * 1e6
+            print(f"{name:<9} {label:<8} {sum(map(len, packed)):>7} {serialize:>13.2f} {parse:>9.2f}")
+
+
+def round_trips(calls):
+    fd, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    app = create_app(mode=type('Benchmark', (config.Testing,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'}))
+    server, url = serve(app)
+    try:
+        session = requests.Session()
+        auth = session.post(url + '/api/user', json={'email': 'bench@wire.test', 'password': 'x'}).json()
+        print(f"\n{'format':<8} {'calls':>6} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7}")
+        for label, (dumps, loads) in FORMATS.items():
+            mediatype = MSGPACK if label == 'msgpack' else 'application/json'
+            headers = {'Content-Type': mediatype, 'Accept': mediatype}
+            latencies = []
+            for _ in range(calls):
+                started = time.perf_counter()
+                res = session.get(url + '/api/auth', data=dumps({'token': auth['token']}), headers=headers)
+                loads(res.content)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            print(f"{label:<8} {calls:>6} {sum(latencies) / calls * 1e3:>8.3f} "
+                  f"{percentile(latencies, 50) * 1e3:>7.3f} {percentile(latencies, 95) * 1e3:>7.3f}")
+    finally:
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--calls', type=int, default=1000, help='HTTP round trips per format')
+    args = parser.parse_args(argv)
+    encoding()
+    if args.calls:
+        round_trips(args.calls)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""index texts by user
+
+Revision ID: 2b456f0de6bf
+Revises: 6eea2a5c05da
+Create Date: 2026-10-18 10:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b456f0de6bf'
+down_revision = '6eea2a5c05da'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() already builds it on databases created from the models
+    indexes = sa.inspect(op.get_bind()).get_indexes('texts')
+    if any(index['name'] == 'ix_texts_user_id_id' for index in indexes):
+        return
+    op.create_index('ix_texts_user_id_id', 'texts', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_texts_user_id_id', table_name='texts')
@@ -0,0 +1,33 @@
+"""cover texts page index
+
+Revision ID: 6ed844c55ed6
+Revises: 2b456f0de6bf
+Create Date: 2026-10-18 16:20:00.000000
+
+The page query reads ``id`` and ``text``, with ``text`` in the index it is
+answered from the index alone.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6ed844c55ed6'
+down_revision = '2b456f0de6bf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() already builds it on databases created from the models
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('texts')}
+    if 'ix_texts_user_id_id_text' not in indexes:
+        op.create_index('ix_texts_user_id_id_text', 'texts', ['user_id', 'id', 'text'], unique=False)
+    if 'ix_texts_user_id_id' in indexes:
+        op.drop_index('ix_texts_user_id_id', table_name='texts')
+
+
+def downgrade():
+    op.create_index('ix_texts_user_id_id', 'texts', ['user_id', 'id'], unique=False)
+    op.drop_index('ix_texts_user_id_id_text', table_name='texts')
@@ -0,0 +1,46 @@
+"""initial schema
+
+Revision ID: 6eea2a5c05da
+Revises: 
+Create Date: 2026-10-18 10:40:00.000000
+
+Tables used to be created by ``db.create_all()`` at startup, so they are
+only created here when missing. Existing databases upgrade cleanly.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6eea2a5c05da'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=256), nullable=False),
+            sa.Column('password_hash', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+    if 'texts' not in tables:
+        op.create_table(
+            'texts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('text', sa.String(length=256), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('texts')
+    op.drop_table('users')
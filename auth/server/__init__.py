@@ -1,45 +1,116 @@
 import os
+import threading
+import time
+
+_import_started = time.perf_counter()
 
 from flask import Flask, Blueprint
 from flask_cors import CORS
-from flask_migrate import Migrate
-from healthcheck import HealthCheck, EnvironmentDump
 
-from server.resources import api, db, login_manager, cache
-from server.resources.utils import db_available
+from server.commands import users_cli
+from server.resources import api, db, login_manager, cache, token_cache, token_signer, hasher, login_limiter, \
+    text_writer, tracer, metrics, pool_monitor, replicas
+from server.resources.utils import db_available, cache_available, pool_saturation
+from server.utils.proxy import TrustedProxyFix
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 client = os.getenv('CLIENT_ORIGIN', '*')
-migrate = Migrate()
 router = Blueprint('api', 'api__module', url_prefix='/api')
 cors = CORS(origin=client, headers=['access-control-allow-origin'])
+api.init_app(router)
 
 
 def create_app(mode):
     """ Generate application instance based on configuration mode """
 
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(mode)
-    migrate.init_app(app, db)
+    if app.config['TRUSTED_PROXIES']:
+        app.wsgi_app = TrustedProxyFix(app.wsgi_app, app.config['TRUSTED_PROXY_NETWORKS'],
+                                       x_for=app.config['TRUSTED_PROXIES'])
+    if app.config['DB_MIGRATIONS']:
+        # Alembic is the slowest import by far, only the `flask db` commands need it
+        from flask_migrate import Migrate
+        Migrate(app, db)
     cache.init_app(app)
+    token_cache.init_app(app)
+    token_signer.init_app(app)
+    hasher.init_app(app)
+    login_limiter.init_app(app)
+    tracer.init_app(app)
     cors.init_app(app)
     attach_monitor(app)
     login_manager.init_app(app)
-    api.init_app(router)
     app.register_blueprint(router)
+    app.cli.add_command(users_cli)
     with app.app_context():
         db.init_app(app)
-        db.create_all()
+        if app.config['DB_CREATE_ALL']:
+            db.create_all()
+    pool_monitor.init_app(app)
+    replicas.init_app(app)
+    text_writer.init_app(app)
+
+    startup = {'import_seconds': IMPORT_SECONDS, 'create_app_seconds': time.perf_counter() - started}
+    app.extensions['startup'] = startup
+    app.logger.info("Imported in {import_seconds:.3f}s, app created in {create_app_seconds:.3f}s".format(**startup))
     return app
 
 
-def attach_monitor(app):
-    """ Attach status and environment endpoints for monitoring site health """
-    health = HealthCheck(app, '/status')
+def cache_nodes() -> dict:
+    """ Node health of the sharded memcached backend, empty for the others """
+    stats = getattr(cache.cache, 'stats', None)
+    return stats() if callable(stats) else {}
+
+
+def build_monitors(app):
+    """ Health checks and environment dump behind /status and /env """
+    from healthcheck import EnvironmentDump
+    from server.utils.health import BackgroundHealthCheck
+
+    health = BackgroundHealthCheck(app)
     envdump = EnvironmentDump(
-        app,
-        '/env',
         include_os=False, include_config=False,
         include_process=False, include_python=False
     )
 
     health.add_check(db_available)
+    health.add_check(cache_available)
+    health.add_check(pool_saturation)
+    envdump.add_section('pool', pool_monitor.stats)
+    envdump.add_section('replicas', replicas.stats)
+    envdump.add_section('cache_nodes', cache_nodes)
+    return health, envdump
+
+
+def attach_monitor(app):
+    """ Attach status and environment endpoints for monitoring site health.
+
+    With ``MONITOR_LAZY`` the health checks and environment dump are only
+    built when /status or /env is first requested.
+    """
+    monitors = []
+    lock = threading.Lock()
+
+    def get_monitors():
+        if not monitors:
+            with lock:
+                if not monitors:
+                    monitors.extend(build_monitors(app))
+        return monitors
+
+    if not app.config['MONITOR_LAZY']:
+        get_monitors()
+    app.add_url_rule('/status', 'check', lambda: get_monitors()[0].check())
+    app.add_url_rule('/env', 'dump_environment', lambda: get_monitors()[1].dump_environment())
+
+    metrics.init_app(app)
+    metrics.add_stats('auth_l1_cache', token_cache.stats)
+    metrics.add_stats('auth_password_hash', hasher.stats)
+    metrics.add_stats('auth_write_behind', text_writer.stats)
+    metrics.add_stats('auth_db_pool', pool_monitor.stats)
+    metrics.add_stats('auth_db_replicas', replicas.stats)
+    metrics.add_stats('auth_cache_nodes', cache_nodes)
+    metrics.add_stats('auth_startup', lambda: app.extensions.get('startup', {}))
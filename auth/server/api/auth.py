@@ -1,74 +1,160 @@
-from typing import Tuple
+from typing import Tuple, List
 
 from flask import current_app as app
-from flask_restful import Resource, reqparse, fields, marshal
-from flask import jsonify
+from flask_restful import Resource, fields, marshal
+from flask import request
 
-from server.resources import api, user_store, errors, cache
+from server.resources import api, user_store, errors, hasher, tracer, login_limiter, metrics
 from server.resources.models import User
-from server.utils.functions import generate_token
+from server.utils.functions import generate_token, load_token, load_tokens, revoke_token, revoke_sessions, \
+    refresh_token
+from server.utils.hashing import HasherBusy
+from server.utils.records import TokenRecord
+from server.utils.schema import RequestSchema, Field
 
 
 def login(email: str, password: str) -> dict:
     """  Login with identity and credentials """
-    app.logger.debug(f"Login user with email: {email}, password: {password}")
-    user: User = user_store.find_user(email=email)
-    app.logger.debug(f"Find user: {user}")
-
-    if user is None or not user.authorize(password):
-        app.logger.debug("Error: InvalidCredentials")
-
+    ip = request.remote_addr
+    with tracer.span('rate_limit', email=email):
+        retry_after = login_limiter.check(email, ip)
+    if retry_after is not None:
+        metrics.logins_throttled.inc()
+        return errors.TooManyAttempts({'Retry-After': str(retry_after)})
+
+    with tracer.span('db_query', email=email) as span:
+        user: User = user_store.find_user(email=email)
+        span.set(found=user is not None)
+
+    try:
+        with tracer.span('hash'):
+            authorized = user is not None and hasher.check(user.password_hash, password)
+    except HasherBusy:
+        app.logger.warning("Password hashing queue is full")
+        return errors.ServiceBusy()
+    if not authorized:
+        login_limiter.charge(email, ip)
         return errors.InvalidCredentials()
-    app.logger.debug("User in")
 
-    token = generate_token(user)
+    token, expires_at = generate_token(user)
 
-    response: dict = {'token': token}
-    app.logger.debug(f"Response: {response}")
+    response: dict = {'token': token, 'expires_at': expires_at}
     return response
 
 
-def check(token: str) -> Tuple[dict, int]:
-    app.logger.debug(f"Checking token: {token}")
-    user: User = cache.get(token)
+def refresh(token: str, rotate: bool = False) -> Tuple[dict, int]:
+    """ Extend a valid token, or swap it for a new one, without credentials """
+    record: TokenRecord = load_token(token)
+    if record is None:
+        return errors.UserDoesntExist()
+    refreshed = refresh_token(token, record, rotate=rotate or app.config['TOKEN_REFRESH_ROTATE'])
+    if refreshed is None:
+        return errors.SessionExpired()
+    token, expires_at = refreshed
+    return {'token': token, 'expires_at': expires_at}, 200
 
-    app.logger.debug(f"Find user: {user}")
-    if user is None:
-        app.logger.debug("Error UserDoesntExist")
 
+def check(token: str) -> Tuple[dict, int]:
+    record: TokenRecord = load_token(token)
+
+    if record is None:
         return errors.UserDoesntExist()
-    response: dict = marshal(user, resource_fields)
-    app.logger.debug(f"Response {response}")
+    response: dict = marshal(record._asdict(), resource_fields)
     return response, 200
 
 
+def check_many(tokens: List[str]) -> Tuple[dict, int]:
+    """ Validate a batch of tokens, reporting a result for each one """
+    if len(tokens) > app.config['AUTH_BATCH_MAX_SIZE']:
+        return errors.BatchTooLarge()
+    results = []
+    for token, record in zip(tokens, load_tokens(tokens)):
+        if record is None:
+            results.append({'token': token, 'valid': False})
+        else:
+            results.append(dict(marshal(record._asdict(), resource_fields), token=token, valid=True))
+    return {'results': results}, 200
+
+
+def logout(token: str, scope: str = None) -> Tuple[dict, int]:
+    """ Revoke a token everywhere, local L1 entries included.
+
+    With ``scope='all'`` every token of the token's owner is revoked.
+    """
+    if scope == 'all':
+        record: TokenRecord = load_token(token)
+        if record is None:
+            return errors.UserDoesntExist()
+        revoke_sessions(record.user_id)
+    revoke_token(token)
+    return {'status': 'successful'}, 200
+
+
 resource_fields = {
     'email': fields.String,
+    'expires_at': fields.Integer(default=None),
 }
 
 
 @api.resource('/auth', endpoint='auth')
 class Authentication(Resource):
-    """ Initialize endpoint argument parsers """
-
-    def __init__(self):
-        self.parser = {
-            'get': reqparse.RequestParser(bundle_errors=True),
-            'post': reqparse.RequestParser(bundle_errors=True),
-        }
-        self.init_parser()
-
-    def init_parser(self):
-        # POST parser arguments
-        self.parser['get'].add_argument('token', trim=True, required=True, help='Token is required')
-        # PUT parser arguments
-        self.parser['post'].add_argument('email', required=True, help='Email is required')
-        self.parser['post'].add_argument('password', required=True, help='Password is required')
+    """ Endpoint argument schemas, compiled once at import """
+
+    parser = {
+        # GET schema arguments
+        'get': RequestSchema(
+            Field('token', trim=True, required=True, help='Token is required'),
+        ),
+        # POST schema arguments
+        'post': RequestSchema(
+            Field('email', required=True, help='Email is required'),
+            Field('password', required=True, help='Password is required'),
+        ),
+        # PUT schema arguments
+        'put': RequestSchema(
+            Field('token', trim=True, required=True, help='Token is required'),
+            Field('rotate', choices=('True', 'False', 'true', 'false'), help='Rotate must be true or false'),
+        ),
+        # DELETE schema arguments
+        'delete': RequestSchema(
+            Field('token', trim=True, required=True, help='Token is required'),
+            Field('scope', choices=('token', 'all'), help='Scope must be one of: token, all'),
+        ),
+    }
 
     def get(self):
-        args = self.parser['get'].parse_args()
+        with tracer.span('parse'):
+            args = self.parser['get'].parse_args()
         return check(args['token'])
 
     def post(self):
-        args = self.parser['post'].parse_args()
+        with tracer.span('parse'):
+            args = self.parser['post'].parse_args()
         return login(**args)
+
+    def put(self):
+        with tracer.span('parse'):
+            args = self.parser['put'].parse_args()
+        return refresh(args['token'], args['rotate'] in ('True', 'true'))
+
+    def delete(self):
+        with tracer.span('parse'):
+            args = self.parser['delete'].parse_args()
+        return logout(args['token'], args['scope'])
+
+
+@api.resource('/auth/batch', endpoint='auth_batch')
+class BatchAuthentication(Resource):
+    """ Endpoint argument schemas, compiled once at import """
+
+    parser = {
+        # POST schema arguments
+        'post': RequestSchema(
+            Field('tokens', action='append', location='json', required=True, help='Tokens are required'),
+        ),
+    }
+
+    def post(self):
+        with tracer.span('parse'):
+            args = self.parser['post'].parse_args()
+        return check_many(args['tokens'])
@@ -1,32 +1,94 @@
-from flask_restful import Resource, reqparse
+import json
 
-from server.resources import api, user_store, db, errors, cache
+from flask import current_app as app, Response, stream_with_context
+from flask_restful import Resource
+
+from server.resources import api, db, errors, text_writer, tracer
 from server.resources.errors import UserDoesntExist
-from server.resources.models import Text, User
-from server.utils.functions import generate_token
+from server.resources.models import Text
+from server.utils.functions import load_token
+from server.utils.records import TokenRecord
+from server.utils.schema import RequestSchema, Field
+from server.utils.writebehind import BufferFull, DURABILITY
+
+MAX_ID = 2 ** 63 - 1
 
 
 @api.resource('/db', endpoint='db')
 class DB(Resource):
-    def __init__(self):
-        """ Initialize endpoint argument parsers """
+    """ Endpoint argument schemas, compiled once at import """
+
+    parser = {
+        # GET schema arguments
+        'get': RequestSchema(
+            Field('token', trim=True, required=True, help='Token is required'),
+            Field('after_id', trim=True, help='Return texts with a greater id'),
+            Field('limit', trim=True, help='Maximum number of texts'),
+            Field('format', choices=('json', 'ndjson'), help='Format must be one of: json, ndjson'),
+        ),
+        # POST schema arguments
+        'post': RequestSchema(
+            Field('text', trim=True, required=True, help='Text is required'),
+            Field('token', trim=True, required=True, help='Token is required'),
+            Field('durability', choices=DURABILITY, help='Durability must be one of: enqueue, commit'),
+        ),
+    }
+
+    def get(self):
+        """ List the token owner's texts in id order, a page at a time.
 
-        self.parser = {
-            'post': reqparse.RequestParser(bundle_errors=True),
-        }
-        self.init_parser()
+        ``after_id`` is the last id of the previous page. With
+        ``format=ndjson`` rows are streamed from a server-side cursor, one
+        JSON object per line, and ``limit`` is optional.
+        """
+        with tracer.span('parse'):
+            args = self.parser['get'].parse_args()
+        record: TokenRecord = load_token(args['token'])
+        if record is None:
+            return UserDoesntExist()
+        stream = args['format'] == 'ndjson'
+        try:
+            after_id = int(args['after_id'] or 0)
+            limit = int(args['limit']) if args['limit'] else (None if stream else app.config['TEXT_PAGE_SIZE'])
+        except ValueError:
+            return errors.InvalidPage()
+        # Anything past a 64-bit integer would only fail in the database driver
+        if not 0 <= after_id <= MAX_ID or (limit is not None and not 1 <= limit <= MAX_ID):
+            return errors.InvalidPage()
+
+        query = db.session.query(Text.id, Text.text) \
+            .filter(Text.user_id == record.user_id, Text.id > after_id) \
+            .order_by(Text.id)
+        if stream:
+            if limit is not None:
+                query = query.limit(limit)
+            return Response(stream_with_context(_ndjson(query)), mimetype='application/x-ndjson')
 
-    def init_parser(self):
-        # POST parser arguments
-        self.parser['post'].add_argument('text', trim=True, required=True, help='Text is required')
-        self.parser['post'].add_argument('token', trim=True, required=True, help='Token is required')
+        limit = min(limit, app.config['TEXT_PAGE_MAX'])
+        with tracer.span('db_query', limit=limit):
+            rows = query.limit(limit + 1).all()
+        texts = [{'id': id, 'text': text} for id, text in rows[:limit]]
+        return {'texts': texts, 'next_after_id': texts[-1]['id'] if len(rows) > limit else None}
 
     def post(self):
-        args = self.parser['post'].parse_args()
-        user: User = cache.get(args['token'])
-        if user is None:
+        with tracer.span('parse'):
+            args = self.parser['post'].parse_args()
+        record: TokenRecord = load_token(args['token'])
+        if record is None:
             return UserDoesntExist()
-        Text(user_id=user.id, text=args['text'])
-        db.session.commit()
+        try:
+            with tracer.span('db_write', durability=args['durability']):
+                saved = text_writer.submit(durability=args['durability'], user_id=record.user_id, text=args['text'])
+        except BufferFull:
+            return errors.ServiceBusy()
+        if not saved:
+            return errors.WriteFailed()
 
         return {"status": "successful"}
+
+
+def _ndjson(query):
+    """ Yield rows as JSON lines without loading the whole result """
+    rows = query.execution_options(stream_results=True).yield_per(app.config['TEXT_STREAM_BATCH'])
+    for id, text in rows:
+        yield json.dumps({'id': id, 'text': text}) + '\n'
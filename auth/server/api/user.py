@@ -1,34 +1,40 @@
-from flask_restful import Resource, reqparse
+from flask_restful import Resource
 
-from server.resources import api, user_store, db, errors
+from server.resources import api, user_store, db, errors, hasher, tracer
 from server.utils.functions import generate_token
+from server.utils.hashing import HasherBusy
+from server.utils.schema import RequestSchema, Field
 
 
 @api.resource('/user', endpoint='user')
 class User(Resource):
-    def __init__(self):
-        """ Initialize endpoint argument parsers """
+    """ Endpoint argument schemas, compiled once at import """
 
-        self.parser = {
-            'post': reqparse.RequestParser(bundle_errors=True),
-        }
-        self.init_parser()
-
-    def init_parser(self):
-        # POST parser arguments
-        self.parser['post'].add_argument('email', trim=True, required=True, help='Email is required')
-        self.parser['post'].add_argument('password', required=True, help='Password is required')
+    parser = {
+        # POST schema arguments
+        'post': RequestSchema(
+            Field('email', trim=True, required=True, help='Email is required'),
+            Field('password', required=True, help='Password is required'),
+        ),
+    }
 
     def post(self):
         """ Create a new user account """
 
-        args = self.parser['post'].parse_args()
-        print(args)
-        if user_store.find_user(email=args['email']):
+        with tracer.span('parse'):
+            args = self.parser['post'].parse_args()
+        try:
+            with tracer.span('hash'):
+                password_hash = hasher.generate(args['password'])
+        except HasherBusy:
+            return errors.ServiceBusy()
+        with tracer.span('db_query', email=args['email']) as span:
+            user = user_store.insert_user(email=args['email'], password_hash=password_hash)
+            if user is not None:
+                db.session.commit()
+            span.set(created=user is not None)
+        if user is None:
             return errors.UserAlreadyExist()
 
-        user = user_store.create_user(email=args['email'], password=args['password'])
-        db.session.commit()
-
-        token = generate_token(user)
-        return {'token': token}
+        token, expires_at = generate_token(user)
+        return {'token': token, 'expires_at': expires_at}
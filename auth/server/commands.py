@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import click
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash
+
+from server.resources import user_store
+from server.utils.functions import revoke_sessions
+
+''' Flask CLI commands '''
+
+users_cli = AppGroup('users', help='Manage user accounts.')
+
+
+def _json_or_none(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _read_users(stream, fmt):
+    """ Yield ``(line, user)`` pairs from a CSV or NDJSON stream.
+
+    ``user`` is an ``{'email', 'password'}`` dict, or None when the row is
+    malformed or lacks either field, so one bad row doesn't stop the import.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = ((number, _json_or_none(line)) for number, line in enumerate(stream, 1) if line.strip())
+    for line, row in rows:
+        email, password = (row.get('email'), row.get('password')) if isinstance(row, dict) else (None, None)
+        if not isinstance(email, str) or not email.strip() or not isinstance(password, str):
+            yield line, None
+        else:
+            yield line, {'email': email.strip(), 'password': password}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@users_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'csv', 'ndjson']), default='auto',
+              help='Input format, guessed from the file extension by default.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Users hashed and inserted per batch.')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Hashing processes.')
+def import_users(path, fmt, chunk_size, workers):
+    """ Bulk import users from a CSV or NDJSON file with plaintext passwords """
+    if fmt == 'auto':
+        fmt = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+    created = duplicates = rejected = 0
+    hash_seconds = insert_seconds = 0.0
+    started = time.perf_counter()
+    with open(path, newline='', encoding='utf-8') as stream, ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in _chunks(_read_users(stream, fmt), chunk_size):
+            for line, user in rows:
+                if user is None:
+                    rejected += 1
+                    click.echo(f'rejected: line {line}, email and password are required', err=True)
+            chunk = [user for _, user in rows if user is not None]
+            if not chunk:
+                continue
+            t0 = time.perf_counter()
+            hashes = pool.map(generate_password_hash, [user.pop('password') for user in chunk],
+                              chunksize=max(1, len(chunk) // (workers * 4)))
+            for user, password_hash in zip(chunk, hashes):
+                user['password_hash'] = password_hash
+            t1 = time.perf_counter()
+            new, skipped = user_store.create_users(chunk)
+            user_store.commit()
+            insert_seconds += time.perf_counter() - t1
+            hash_seconds += t1 - t0
+
+            created += len(new)
+            duplicates += len(skipped)
+            for email in skipped:
+                click.echo(f'duplicate: {email}', err=True)
+
+    elapsed = time.perf_counter() - started
+    total = created + duplicates + rejected
+    click.echo(f'{created} created, {duplicates} duplicates, {rejected} rejected, {total} read in {elapsed:.2f}s '
+               f'({total / elapsed if elapsed else 0:.0f} users/s; '
+               f'hashing {hash_seconds:.2f}s, inserting {insert_seconds:.2f}s)')
+
+
+@users_cli.command('revoke')
+@click.argument('email')
+def revoke_user(email):
+    """ Revoke every outstanding token of a user, e.g. after a compromise """
+    user = user_store.find_user(email=email)
+    if user is None:
+        raise click.ClickException(f'No user with email {email}')
+    if not revoke_sessions(user.id):
+        raise click.ClickException('Could not update the session generation, is the cache reachable?')
+    click.echo(f'Revoked all sessions of {email}')
@@ -1,21 +1,149 @@
 import os
 
 
+def env_bool(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def signing_keys(spec, fallback):
+    """ Parse ``kid:secret,kid:secret`` into a dict, falling back to a single key """
+    if not spec:
+        return {'0': fallback} if fallback else {}
+    return dict(item.strip().split(':', 1) for item in spec.split(',') if item.strip())
+
+
+def engine_options():
+    """ SQLAlchemy pool settings, sized per gunicorn worker """
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+    }
+
+
 class Config(object):
     DEBUG = False
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = os.getenv('SECRET_KEY') or os.urandom(32)
+    # Create missing tables at startup, production runs `flask db upgrade` once instead
+    DB_CREATE_ALL = env_bool('DB_CREATE_ALL', True)
+    # Register the `flask db` migration commands
+    DB_MIGRATIONS = env_bool('DB_MIGRATIONS', True)
+    # Build /status and /env on their first request instead of at startup
+    MONITOR_LAZY = env_bool('MONITOR_LAZY')
+    # Connections opened per worker at startup
+    DB_POOL_PREWARM = int(os.getenv('DB_POOL_PREWARM', 0))
+    # Read replicas for user lookups, comma separated URLs
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    # "round_robin" or "least_connections"
+    REPLICA_STRATEGY = os.getenv('REPLICA_STRATEGY', 'round_robin')
+    # Seconds a failing replica is skipped before it is tried again
+    REPLICA_RETRY_AFTER = float(os.getenv('REPLICA_RETRY_AFTER', 30))
     CACHE_TYPE = "simple"
+    # Copies of each key kept by the sharded memcached backend (server.utils.sharding), at least
+    # two with several nodes so a tombstone survives one of them dropping out
+    CACHE_REPLICAS = int(os.getenv('CACHE_REPLICAS', 2))
+    # Seconds a failed memcached node is skipped and the socket timeout for each call
+    CACHE_DEAD_RETRY = float(os.getenv('CACHE_DEAD_RETRY', 30))
+    CACHE_SOCKET_TIMEOUT = float(os.getenv('CACHE_SOCKET_TIMEOUT', 1))
+    # Deleted keys are kept as tombstones this long, at least the longest a token lives
+    CACHE_TOMBSTONE_TIMEOUT = int(os.getenv('CACHE_TOMBSTONE_TIMEOUT', os.getenv('TOKEN_TIMEOUT', 10000)))
+    TOKEN_TIMEOUT = int(os.getenv('TOKEN_TIMEOUT', 10000))
+    # Refreshing slides the expiry by TOKEN_TIMEOUT up to this many seconds after login
+    TOKEN_MAX_LIFETIME = int(os.getenv('TOKEN_MAX_LIFETIME', 30 * 24 * 60 * 60))
+    # Hand out a new opaque token on refresh instead of extending the old one
+    TOKEN_REFRESH_ROTATE = env_bool('TOKEN_REFRESH_ROTATE')
+    # Per-process L1 token cache in front of memcached
+    TOKEN_L1_ENABLED = env_bool('TOKEN_L1_ENABLED')
+    TOKEN_L1_MAX_ENTRIES = int(os.getenv('TOKEN_L1_MAX_ENTRIES', 10000))
+    TOKEN_L1_TTL = float(os.getenv('TOKEN_L1_TTL', 5))
+    # "opaque" random tokens resolved in the cache or "signed" self-contained tokens
+    TOKEN_MODE = os.getenv('TOKEN_MODE', 'opaque')
+    # Never the random SECRET_KEY fallback, it would differ between workers
+    TOKEN_SIGNING_KEYS = signing_keys(os.getenv('TOKEN_SIGNING_KEYS'), os.getenv('SECRET_KEY'))
+    TOKEN_SIGNING_KEY_ID = os.getenv('TOKEN_SIGNING_KEY_ID')
+    # Check revoked signed tokens against a denylist in the cache
+    TOKEN_DENYLIST = env_bool('TOKEN_DENYLIST', True)
+    # Failed logins allowed per email and per client IP in a sliding window
+    LOGIN_RATE_LIMIT_ENABLED = env_bool('LOGIN_RATE_LIMIT_ENABLED', True)
+    LOGIN_RATE_WINDOW = int(os.getenv('LOGIN_RATE_WINDOW', 300))
+    LOGIN_RATE_PER_EMAIL = int(os.getenv('LOGIN_RATE_PER_EMAIL', 10))
+    LOGIN_RATE_PER_IP = int(os.getenv('LOGIN_RATE_PER_IP', 100))
+    # Proxies in front of the service whose X-Forwarded-For is trusted (the web tier), only
+    # when the request comes from one of TRUSTED_PROXY_NETWORKS (the compose network by default)
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 1))
+    TRUSTED_PROXY_NETWORKS = [network.strip() for network in os.getenv(
+        'TRUSTED_PROXY_NETWORKS', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16').split(',')
+        if network.strip()]
+    AUTH_BATCH_MAX_SIZE = int(os.getenv('AUTH_BATCH_MAX_SIZE', 100))
+    # Password hashing pool per gunicorn worker: 0 hashes inline in the request worker.
+    # The default splits the cores between the WEB_CONCURRENCY workers gunicorn starts.
+    # Hashes only queue up, and HASH_QUEUE_DEPTH only turns them away, with threaded workers
+    HASH_POOL_WORKERS = int(os.getenv(
+        'HASH_POOL_WORKERS', max(1, (os.cpu_count() or 1) // int(os.getenv('WEB_CONCURRENCY', 1)))))
+    HASH_QUEUE_DEPTH = int(os.getenv('HASH_QUEUE_DEPTH', 16))
+    HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', 10))
+    # Group commit for POST /api/db texts
+    WRITE_BEHIND_ENABLED = env_bool('WRITE_BEHIND_ENABLED')
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 100))
+    WRITE_BEHIND_FLUSH_MS = float(os.getenv('WRITE_BEHIND_FLUSH_MS', 50))
+    WRITE_BEHIND_MAX_ROWS = int(os.getenv('WRITE_BEHIND_MAX_ROWS', 10000))
+    # "enqueue" acknowledges once buffered, "commit" after the group commit. Batches only grow
+    # past one row with threaded workers, with sync workers "commit" just adds up to
+    # WRITE_BEHIND_FLUSH_MS to every write
+    WRITE_BEHIND_DURABILITY = os.getenv('WRITE_BEHIND_DURABILITY', 'commit')
+    # Seconds a group commit may take, a "commit" write fails after the flush interval plus this
+    WRITE_BEHIND_STATEMENT_TIMEOUT = float(os.getenv('WRITE_BEHIND_STATEMENT_TIMEOUT', 5))
+    # GET /api/db page sizes and rows fetched per server-side cursor batch
+    TEXT_PAGE_SIZE = int(os.getenv('TEXT_PAGE_SIZE', 50))
+    TEXT_PAGE_MAX = int(os.getenv('TEXT_PAGE_MAX', 500))
+    TEXT_STREAM_BATCH = int(os.getenv('TEXT_STREAM_BATCH', 1000))
+    # Request tracing, fraction of requests sampled (0 turns it off)
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+    TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 256))
+    # Directory shared by all workers to aggregate /metrics, per process when unset
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    # Background health checks behind /status
+    HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 10))
+    HEALTH_CHECK_TTL = float(os.getenv('HEALTH_CHECK_TTL', 30))
+    HEALTH_POOL_SATURATION = float(os.getenv('HEALTH_POOL_SATURATION', 0.9))
+    # Shared secret for /admin/* endpoints, disabled when unset
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
 
 class Development(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    DB_POOL_PREWARM = int(os.getenv('DB_POOL_PREWARM', 2))
     CACHE_TYPE = "memcached"
     CACHE_MEMCACHED_SERVERS = ["cache:11211"]
     CACHE_KEY_PREFIX = "flask_auth"
 
 
+class Production(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    DB_POOL_PREWARM = int(os.getenv('DB_POOL_PREWARM', 2))
+    # Consistent hashing over every node in MEMCACHED_SERVERS
+    CACHE_TYPE = "server.utils.sharding.ShardedMemcachedCache"
+    CACHE_MEMCACHED_SERVERS = os.getenv('MEMCACHED_SERVERS', 'cache:11211').split(',')
+    CACHE_KEY_PREFIX = "flask_auth"
+    # Schema changes ship as migrations, applied by a separate one-shot step
+    DB_CREATE_ALL = False
+    DB_MIGRATIONS = env_bool('DB_MIGRATIONS')
+    MONITOR_LAZY = env_bool('MONITOR_LAZY', True)
+
+
 class Testing(Config):
     TESTING = True
+    TOKEN_SIGNING_KEYS = {'0': 'testing'}
+    HASH_POOL_WORKERS = 0
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
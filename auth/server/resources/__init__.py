@@ -3,19 +3,40 @@ from flask_login import LoginManager
 from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 
+from server.utils.cache import TieredCache
 from server.utils.datastore import SQLAlchemyUserDatastore
+from server.utils.hashing import HashingExecutor
+from server.utils.metrics import Metrics
+from server.utils.pool import PoolMonitor
+from server.utils.ratelimit import LoginLimiter
+from server.utils.replicas import ReplicaRouter
+from server.utils.signing import TokenSigner
+from server.utils.tracing import Tracer
+from server.utils import wire
+from server.utils.writebehind import WriteBehindBuffer
 
 ''' Application resources '''
 db = SQLAlchemy()
 api = Api()
+if wire.msgpack is not None:
+    api.representations[wire.MSGPACK] = wire.output_msgpack
 login_manager = LoginManager()
 cache = Cache()
+token_cache = TieredCache(cache)
+token_signer = TokenSigner()
+hasher = HashingExecutor()
+login_limiter = LoginLimiter(cache)
+tracer = Tracer()
+metrics = Metrics()
+pool_monitor = PoolMonitor(db)
+replicas = ReplicaRouter(db)
 
 ''' User store '''
 from server.resources import models
-user_store = SQLAlchemyUserDatastore(db, models.User)
+user_store = SQLAlchemyUserDatastore(db, models.User, router=replicas)
+text_writer = WriteBehindBuffer(db, models.Text)
 
 ''' Api endpoints '''
-from server.api.auth import Authentication
+from server.api.auth import Authentication, BatchAuthentication
 from server.api.user import User
 from server.api.db import DB
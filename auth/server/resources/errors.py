@@ -6,7 +6,9 @@ class ApiError(dict):
         super().__init__()
         self.update({'status': status, 'message': message})
 
-    def __call__(self):
+    def __call__(self, headers=None):
+        if headers:
+            return self, self['status'], headers
         return self, self['status']
 
 
@@ -16,3 +18,15 @@ UserAlreadyExist = ApiError(401, 'A user with that email already exists')
 InvalidCredentials = ApiError(401, 'Invalid email or password')
 
 UserDoesntExist = ApiError(401, 'User doesn`t exist ')
+
+SessionExpired = ApiError(401, 'Session reached its maximum lifetime, log in again')
+
+InvalidPage = ApiError(400, 'after_id must be a non-negative integer and limit a positive integer')
+
+TooManyAttempts = ApiError(429, 'Too many failed login attempts, try again later')
+
+BatchTooLarge = ApiError(413, 'Too many tokens in batch')
+
+ServiceBusy = ApiError(503, 'Service is busy, try again later')
+
+WriteFailed = ApiError(503, 'Text could not be saved')
@@ -1,15 +1,15 @@
 from flask_login import UserMixin
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 from sqlalchemy.orm import relationship
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from server.resources import db, login_manager
+from server.resources import db, login_manager, replicas
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.query(User).get(user_id)
+    return replicas.read(lambda session: session.query(User).get(user_id))
 
 
 class User(UserMixin, db.Model):
@@ -18,9 +18,12 @@ class User(UserMixin, db.Model):
     email = Column(String(256), unique=True, nullable=False)
     password_hash = Column(String(100), nullable=False)
 
-    def __init__(self, email, password, **kwargs):
+    def __init__(self, email, password=None, password_hash=None, **kwargs):
         self.email = email
-        self.password = password
+        if password_hash is not None:
+            self.password_hash = password_hash
+        else:
+            self.password = password
 
     def __repr__(self):
         return "<User {}:{}>".format(self.id, self.email)
@@ -40,6 +43,9 @@ class User(UserMixin, db.Model):
 
 class Text(db.Model):
     __tablename__ = 'texts'
+    # Keyset pagination of a user's texts walks this index in id order, covering the text
+    # as well so pages are read from the index alone
+    __table_args__ = (Index('ix_texts_user_id_id_text', 'user_id', 'id', 'text'),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey(User.id))
     text = Column(String(256), nullable=False)
@@ -1,12 +1,45 @@
-from server.resources import db
+import os
+from uuid import uuid4
+
+from flask import current_app
+
+from server.resources import db, cache
 
 ''' Check if database is available on network '''
 
 
 def db_available():
     try:
-        session = db.create_scoped_session()
-        session.execute('SELECT 1')
+        with db.engine.connect() as connection:
+            connection.execute('SELECT 1')
         return True, "Database OK!"
     except Exception as e:
         return False, str(e)
+
+
+''' Check if the token cache is reachable '''
+
+
+def cache_available():
+    # One key per worker left to expire, deleting it would leave a tombstone behind on every probe
+    key, nonce = f'health:{os.getpid()}', uuid4().hex
+    try:
+        if not cache.set(key, nonce, timeout=10) or cache.get(key) != nonce:
+            return False, "Cache didn't store the probe key"
+        return True, "Cache OK!"
+    except Exception as e:
+        return False, str(e)
+
+
+''' Check the database connection pool isn't exhausted '''
+
+
+def pool_saturation():
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+        return True, f"{type(pool).__name__} is not bounded"
+    capacity = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+    used = pool.checkedout()
+    ratio = used / capacity if capacity else 0.0
+    output = f"{used}/{capacity} connections checked out"
+    return ratio < current_app.config['HEALTH_POOL_SATURATION'], output
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+
+''' Per-process L1 cache layered over the shared Flask-Caching backend '''
+
+
+class LocalCache(object):
+    """ Bounded LRU with a per-entry time to live.
+
+    :param max_entries: Number of entries kept before the least recently
+        used one is evicted
+    :param ttl: Seconds an entry stays valid after it was stored
+    """
+
+    def __init__(self, max_entries=10000, ttl=5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        expires = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class TieredCache(object):
+    """ Read-through L1 in front of a Flask-Caching ``Cache``.
+
+    Reads are answered from the local LRU when possible and populate it on
+    a backend hit. Writes and deletes always go to the backend, so a token
+    revoked on one worker stays valid on the others for at most the L1 TTL.
+    """
+
+    def __init__(self, backend, app=None):
+        self.backend = backend
+        self.local = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('TOKEN_L1_ENABLED', False):
+            self.local = None
+            return
+        # Keep L1 strictly below the backend timeout
+        ttl = min(app.config['TOKEN_L1_TTL'], app.config['TOKEN_TIMEOUT'] - 1)
+        self.local = LocalCache(max_entries=app.config['TOKEN_L1_MAX_ENTRIES'], ttl=ttl)
+
+    def get(self, key):
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                return value
+        value = self.backend.get(key)
+        if value is not None and self.local is not None:
+            self.local.set(key, value)
+        return value
+
+    def get_many(self, *keys):
+        """ Resolve several keys with at most one backend multi-get """
+        values = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            if self.local is not None:
+                values[i] = self.local.get(key)
+            if values[i] is None:
+                missing.append(i)
+        if missing:
+            fetched = self.backend.get_many(*[keys[i] for i in missing])
+            for i, value in zip(missing, fetched):
+                values[i] = value
+                if value is not None and self.local is not None:
+                    self.local.set(keys[i], value)
+        return values
+
+    def refresh(self, key):
+        """ Read ``key`` from the backend, replacing the L1 copy """
+        value = self.backend.get(key)
+        if self.local is not None:
+            if value is None:
+                self.local.delete(key)
+            else:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout=None):
+        ret = self.backend.set(key, value, timeout=timeout)
+        if self.local is not None:
+            self.local.set(key, value, ttl=timeout or None)
+        return ret
+
+    def delete(self, key):
+        if self.local is not None:
+            self.local.delete(key)
+        return self.backend.delete(key)
+
+    def inc(self, key, delta=1):
+        """ Atomically increment a backend counter, None if the key is missing """
+        if self.local is not None:
+            self.local.delete(key)
+        return self.backend.cache.inc(key, delta=delta)
+
+    def stats(self):
+        if self.local is None:
+            return {'enabled': False}
+        return dict(self.local.stats(), enabled=True)
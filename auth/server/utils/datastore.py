@@ -281,11 +281,19 @@ class UserDatastore(object):
 class SQLAlchemyUserDatastore(SQLAlchemyDatastore, UserDatastore):
     """A SQLAlchemy datastore implementation for Flask-Security that assumes the
     use of the Flask-SQLAlchemy extension.
+
+    Lookups go through ``router.read`` when a replica router is given.
     """
 
-    def __init__(self, db, user_model):
+    def __init__(self, db, user_model, router=None):
         SQLAlchemyDatastore.__init__(self, db)
         UserDatastore.__init__(self, user_model)
+        self.router = router
+
+    def _read(self, query):
+        if self.router is None:
+            return query(self.db.session)
+        return self.router.read(query)
 
     def get_user(self, identifier):
         from sqlalchemy import inspect
@@ -309,11 +317,122 @@ class SQLAlchemyUserDatastore(SQLAlchemyDatastore, UserDatastore):
                 or (pk_isuuid and self._is_uuid(identifier))
                 or (not pk_isnumeric and not pk_isuuid)
         ):
-            rv = self.user_model.query.get(identifier)
+            rv = self._read(lambda session: session.query(self.user_model).get(identifier))
             if rv is not None:
                 return rv
 
     def find_user(self, **kwargs):
-        query = self.user_model.query
+        return self._read(lambda session: session.query(self.user_model).filter_by(**kwargs).first())
+
+    def insert_user(self, **kwargs):
+        """Creates a user unless its email is already taken, in one statement.
+
+        Uses ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` on PostgreSQL and
+        ``INSERT OR IGNORE`` on SQLite, so concurrent signups for the same
+        email can't both pass an existence check. Other dialects fall back to
+        an insert inside a savepoint.
+
+        Returns the new (detached) user, or ``None`` if the email exists.
+        Remember to call commit on DB.
+        """
+        from sqlalchemy.exc import IntegrityError
+        from sqlalchemy.orm import make_transient_to_detached
+
+        kwargs = self._prepare_create_user_args(**kwargs)
+        table = self.user_model.__table__
+        row = {key: value for key, value in kwargs.items() if key in table.columns}
+        session = self.db.session
+        dialect = session.get_bind().dialect.name
+
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            statement = insert(table).values(**row).on_conflict_do_nothing(
+                index_elements=[table.c.email]
+            ).returning(table.c.id)
+            new_id = session.execute(statement).scalar()
+        elif dialect == 'sqlite':
+            result = session.execute(table.insert().prefix_with('OR IGNORE').values(**row))
+            new_id = result.lastrowid if result.rowcount == 1 else None
+        else:
+            try:
+                with session.begin_nested():
+                    new_id = session.execute(table.insert().values(**row)).inserted_primary_key[0]
+            except IntegrityError:
+                new_id = None
+
+        if new_id is None:
+            return None
+        user = self.user_model(**kwargs)
+        user.id = new_id
+        make_transient_to_detached(user)
+        return user
+
+    def create_users(self, users):
+        """Bulk-inserts users, skipping emails that are already taken.
 
-        return query.filter_by(**kwargs).first()
+        :param users: list of dicts holding ``email`` and an already hashed
+            ``password_hash``; other keys that aren't columns are ignored.
+
+        Like :meth:`insert_user` conflicts are resolved by the database, with
+        ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` on PostgreSQL and an
+        executemany ``INSERT OR IGNORE`` on SQLite, so an email taken by a
+        signup while the batch runs is reported as a duplicate instead of
+        failing it.
+
+        Returns a tuple ``(created, duplicates)`` of email lists, in input
+        order; emails repeated within ``users`` are duplicates after their
+        first occurrence. Remember to call commit on DB.
+        """
+        table = self.user_model.__table__
+        columns = set(table.columns.keys())
+        rows = {}
+        for user in users:
+            rows.setdefault(user['email'], {key: value for key, value in user.items() if key in columns})
+        inserted = self._insert_ignoring_conflicts(table, list(rows.values())) if rows else set()
+
+        created, duplicates = [], []
+        for user in users:
+            email = user['email']
+            if email in inserted:
+                inserted.discard(email)
+                created.append(email)
+            else:
+                duplicates.append(email)
+        return created, duplicates
+
+    def _insert_ignoring_conflicts(self, table, rows):
+        """ Insert ``rows``, returning the set of emails actually inserted """
+        from sqlalchemy.exc import IntegrityError
+
+        session = self.db.session
+        dialect = session.get_bind().dialect.name
+        inserted = set()
+        # Multi-row VALUES and executemany need the same columns in every row
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            for group in groups.values():
+                statement = insert(table).values(group).on_conflict_do_nothing(
+                    index_elements=[table.c.email]
+                ).returning(table.c.email)
+                inserted.update(email for email, in session.execute(statement))
+        elif dialect == 'sqlite':
+            from sqlalchemy import select
+            for group in groups.values():
+                count = session.execute(table.insert().prefix_with('OR IGNORE'), group).rowcount
+                # The write lock is held until commit and new rows get ids above every existing
+                # one, so the rows just inserted are the newest ``count`` rows of the table
+                if count > 0:
+                    newest = select([table.c.email]).order_by(table.c.id.desc()).limit(count)
+                    inserted.update(email for email, in session.execute(newest))
+        else:
+            for row in rows:
+                try:
+                    with session.begin_nested():
+                        session.execute(table.insert().values(**row))
+                    inserted.add(row['email'])
+                except IntegrityError:
+                    pass
+        return inserted
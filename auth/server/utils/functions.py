@@ -1,14 +1,226 @@
+import time
+from typing import Optional, List, Tuple
 from uuid import uuid4
 
 from flask import current_app as app
 
-from server.resources import cache
+from server.resources import cache, token_cache, token_signer, tracer, metrics
+from server.utils.records import TokenRecord, RECORD_VERSION, encode_record, decode_record
+from server.utils.signing import is_signed
 
+DENYLIST_PREFIX = 'deny:'
+GENERATION_PREFIX = 'gen:'
 
-def generate_token(user):
-    token: str = uuid4().hex
-    app.logger.debug(f"Generate token: {token}")
-    app.logger.debug(f"Setting cache key: {token} value: {user}")
-    ret = cache.set(token, user, timeout=10000)
-    app.logger.debug(f"Cache is set: {ret}")
+
+def _generation_key(user_id) -> str:
+    return f'{GENERATION_PREFIX}{user_id}'
+
+
+def current_generation(user_id) -> int:
+    """ The user's session generation, created on first use.
+
+    Generations start at the current epoch second rather than 1, so a
+    counter evicted from the cache and created again can't bring back
+    tokens stamped with the old value.
+    """
+    key = _generation_key(user_id)
+    with tracer.span('cache_get', generation=True):
+        generation = cache.get(key)
+    if generation is None:
+        initial = int(time.time())
+        cache.add(key, initial, timeout=0)
+        generation = cache.get(key)
+        if generation is None:
+            return initial
+    return int(generation)
+
+
+def _is_current(record: TokenRecord, generation) -> bool:
+    """ Whether ``record`` belongs to the user's live session generation.
+
+    Counters are stored without a timeout but memcached can still evict
+    them under memory pressure. A missing counter fails closed: every
+    session of that user is logged out, and the next login starts a new
+    counter at the current epoch second. Rebuilding it from the token
+    being checked would revive tokens revoked before the eviction, so
+    logging the user out is the price of keeping revocations. Counters
+    read on every check stay near the head of the LRU, so it is mostly
+    idle users who are affected.
+    """
+    if record.generation is None:
+        # v1 records predate generations, valid until the user gets one
+        return generation is None
+    # Fail closed when the counter is missing
+    return generation is not None and int(generation) == record.generation
+
+
+def _latest_generation(record: TokenRecord, generation):
+    """ Re-read a counter older than the token itself from the backend.
+
+    The token was issued after the counter moved, so the value came from a
+    stale L1 entry, e.g. a login right after a revoke-all on another worker.
+    """
+    if generation is not None and record.generation is not None and record.generation > int(generation):
+        with tracer.span('cache_get', generation=True, refresh=True):
+            return token_cache.refresh(_generation_key(record.user_id))
+    return generation
+
+
+def revoke_sessions(user_id) -> bool:
+    """ Invalidate every token issued to a user with one counter increment """
+    key = _generation_key(user_id)
+    if token_cache.inc(key) is None:
+        # A missing counter already rejects every v2 token, start a new one
+        # so v1 tokens stop being accepted as well
+        return bool(cache.add(key, int(time.time()), timeout=0))
+    return True
+
+
+def token_expiry(record: TokenRecord, now: int) -> int:
+    """ Sliding expiry, capped at the session's absolute maximum lifetime """
+    return min(now + app.config['TOKEN_TIMEOUT'], record.issued_at + app.config['TOKEN_MAX_LIFETIME'])
+
+
+def _issue(record: TokenRecord, token: Optional[str] = None) -> str:
+    """ Sign ``record`` or store it under ``token`` (a new one if omitted) until it expires """
+    if app.config['TOKEN_MODE'] == 'signed':
+        with tracer.span('sign'):
+            return token_signer.sign(record, record.expires_at)
+    token = token or uuid4().hex
+    timeout = max(record.expires_at - int(time.time()), 1)
+    with tracer.span('cache_set', token=token) as span:
+        span.set(stored=token_cache.set(token, encode_record(record), timeout=timeout))
     return token
+
+
+def generate_token(user) -> Tuple[str, int]:
+    """ Issue a token for ``user``, returns it with its expiry """
+    record = TokenRecord.from_user(user, generation=current_generation(user.id))
+    record = record._replace(expires_at=token_expiry(record, record.issued_at))
+    metrics.tokens_issued.inc()
+    return _issue(record), record.expires_at
+
+
+def refresh_token(token: str, record: TokenRecord, rotate: bool = False) -> Optional[Tuple[str, int]]:
+    """ Push a valid token's expiry forward without checking the password again.
+
+    Opaque tokens keep their value unless ``rotate`` is set, the record is
+    simply stored again with the new timeout. Signed tokens can't be
+    extended and always rotate. A replaced token is revoked, so refreshing
+    never leaves a second live token behind. Returns None once the session
+    has reached ``TOKEN_MAX_LIFETIME``.
+    """
+    now = int(time.time())
+    expires_at = token_expiry(record, now)
+    if expires_at <= now:
+        return None
+    generation = record.generation
+    if generation is None:
+        generation = current_generation(record.user_id)
+    record = record._replace(version=RECORD_VERSION, generation=generation, expires_at=expires_at)
+    keep = None if rotate or is_signed(token) else token
+    new = _issue(record, keep)
+    if new != token:
+        revoke_token(token)
+    return new, expires_at
+
+
+def load_token(token: str) -> Optional[TokenRecord]:
+    """ Resolve a token into its record, None if unknown, expired or revoked """
+    record = _load_token(token)
+    if record is None:
+        metrics.token_misses.inc()
+    else:
+        metrics.tokens_validated.inc()
+    return record
+
+
+def _load_token(token: str) -> Optional[TokenRecord]:
+    if not token:
+        return None
+    if is_signed(token):
+        with tracer.span('verify', token=token):
+            signed = token_signer.verify(token)
+        if signed is None:
+            return None
+        record = signed.record
+        if not app.config['TOKEN_DENYLIST']:
+            with tracer.span('cache_get', token=token):
+                generation = token_cache.get(_generation_key(record.user_id))
+            return record if _is_current(record, _latest_generation(record, generation)) else None
+        with tracer.span('cache_get_many', token=token, denylist=True):
+            denied, generation = token_cache.get_many(
+                DENYLIST_PREFIX + signed.signature, _generation_key(record.user_id))
+        return record if not denied and _is_current(record, _latest_generation(record, generation)) else None
+    with tracer.span('cache_get', token=token) as span:
+        record = _decode(token_cache.get(token))
+        span.set(hit=record is not None)
+    if record is None:
+        return None
+    with tracer.span('cache_get', generation=True):
+        generation = token_cache.get(_generation_key(record.user_id))
+    return record if _is_current(record, _latest_generation(record, generation)) else None
+
+
+def _decode(raw) -> Optional[TokenRecord]:
+    if raw is None:
+        return None
+    try:
+        return decode_record(raw)
+    except ValueError:
+        return None
+
+
+def load_tokens(tokens: List[str]) -> List[Optional[TokenRecord]]:
+    """ Resolve many tokens with one cache multi-get plus one for generations """
+    records: List[Optional[TokenRecord]] = [None] * len(tokens)
+    keys, owners = [], []
+    for i, token in enumerate(tokens):
+        if not token or not isinstance(token, str):
+            continue
+        if is_signed(token):
+            signed = token_signer.verify(token)
+            if signed is None:
+                continue
+            records[i] = signed.record
+            if app.config['TOKEN_DENYLIST']:
+                keys.append(DENYLIST_PREFIX + signed.signature)
+                owners.append(i)
+        else:
+            keys.append(token)
+            owners.append(i)
+    if keys:
+        with tracer.span('cache_get_many', keys=len(keys)):
+            values = token_cache.get_many(*keys)
+        for i, key, value in zip(owners, keys, values):
+            if key.startswith(DENYLIST_PREFIX):
+                if value:
+                    records[i] = None
+            else:
+                records[i] = _decode(value)
+    users = sorted({record.user_id for record in records if record is not None})
+    if users:
+        with tracer.span('cache_get_many', generations=len(users)):
+            generations = dict(zip(users, token_cache.get_many(*map(_generation_key, users))))
+        for record in records:
+            if record is not None:
+                generations[record.user_id] = _latest_generation(record, generations[record.user_id])
+        records = [record if record is not None and _is_current(record, generations[record.user_id]) else None
+                   for record in records]
+    valid = sum(record is not None for record in records)
+    metrics.tokens_validated.inc(valid)
+    metrics.token_misses.inc(len(records) - valid)
+    return records
+
+
+def revoke_token(token: str) -> bool:
+    """ Drop a token from the local and shared caches """
+    if not token:
+        return False
+    if is_signed(token):
+        signed = token_signer.verify(token)
+        if signed is None:
+            return False
+        remaining = max(int(signed.expires_at - time.time()), 1)
+        return bool(cache.set(DENYLIST_PREFIX + signed.signature, 1, timeout=remaining))
+    return bool(token_cache.delete(token))
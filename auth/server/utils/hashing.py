@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+''' Password hashing offloaded to a bounded process pool '''
+
+
+class HasherBusy(Exception):
+    """ Raised when the hashing queue is full """
+
+
+def _timed(function, *args):
+    """ Run in a pool worker, returning the result with its start/end time """
+    started = time.monotonic()
+    result = function(*args)
+    return result, started, time.monotonic()
+
+
+class HashingExecutor(object):
+    """ Run PBKDF2 work outside of the request worker.
+
+    At most ``HASH_POOL_WORKERS`` hashes run at once and up to
+    ``HASH_QUEUE_DEPTH`` more may wait; anything beyond that raises
+    ``HasherBusy`` immediately instead of piling up. A hash that outlives
+    ``HASH_TIMEOUT`` fails its request but keeps its slot until the pool
+    finishes it. With zero workers the
+    hash runs inline, still metered, which is what testing uses.
+    """
+
+    def __init__(self, app=None):
+        self.workers = 0
+        self.queue_depth = 0
+        self.timeout = None
+        self._slots = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config['HASH_POOL_WORKERS']
+        self.queue_depth = app.config['HASH_QUEUE_DEPTH']
+        self.timeout = app.config['HASH_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + self.queue_depth)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # Pools don't survive a fork, so every worker process builds its own
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        raise HasherBusy()
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            self._reject()
+        submitted = time.monotonic()
+        if self.workers > 0:
+            try:
+                future = self.pool.submit(_timed, function, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            # The slot is held until the hash is done, even if the caller stops waiting for it
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                result, started, finished = future.result(self.timeout)
+            except FuturesTimeout:
+                # Only drops a hash still queued, a running one finishes in its process
+                future.cancel()
+                self._reject()
+        else:
+            try:
+                result, started, finished = _timed(function, *args)
+            finally:
+                self._slots.release()
+        wait = max(started - submitted, 0.0)
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds += wait
+            self.hash_seconds += finished - started
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return result
+
+    def generate(self, password: str) -> str:
+        return self._run(generate_password_hash, password)
+
+    def check(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=True)
+        self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_seconds_total': self.wait_seconds,
+            'hash_seconds_total': self.hash_seconds,
+            'max_wait_seconds': self.max_wait_seconds,
+        }
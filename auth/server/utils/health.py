@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+
+from healthcheck import HealthCheck
+
+''' Health checks refreshed in the background and served from memory '''
+
+
+class BackgroundHealthCheck(HealthCheck):
+    """ HealthCheck whose checks run every ``HEALTH_CHECK_INTERVAL`` seconds
+    on a daemon thread instead of inside the ``/status`` request.
+
+    A result older than ``HEALTH_CHECK_TTL`` is reported as failed, so a
+    stuck refresher can't keep advertising a healthy instance.
+    """
+
+    def __init__(self, app=None, path=None, **kwargs):
+        self.app = None
+        self.interval = 10.0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        super().__init__(app, path, **kwargs)
+
+    def init_app(self, app, path):
+        self.app = app
+        self.interval = app.config['HEALTH_CHECK_INTERVAL']
+        self.success_ttl = self.failed_ttl = app.config['HEALTH_CHECK_TTL']
+        super().init_app(app, path)
+
+    def refresh(self):
+        with self.app.app_context():
+            results = {checker: self.run_check(checker) for checker in self.checkers}
+        self.cache = results
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                self.app.logger.error(f"Health check refresh failed: {e}")
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, each worker starts its own refresher
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.refresh()
+                    self._thread = threading.Thread(target=self._refresh_forever, name='health', daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def check(self):
+        self._ensure_thread()
+        now = time.time()
+        cache = self.cache
+        results = []
+        for checker in self.checkers:
+            result = cache.get(checker)
+            if result is None:
+                result = {'checker': checker.__name__, 'output': 'pending', 'passed': False,
+                          'timestamp': now, 'expires': now}
+            elif result['expires'] < now:
+                result = dict(result, passed=False, output=f"stale: {result['output']}")
+            results.append(result)
+
+        if all(result['passed'] for result in results):
+            return self.success_handler(results), self.success_status, self.success_headers
+        return self.failed_handler(results), self.failed_status, self.failed_headers
@@ -0,0 +1,217 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+''' Per-process metrics exported in the Prometheus text format '''
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(n, str(v).replace('\\', r'\\').replace('"', r'\"'))
+                     for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter(object):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {'|'.join(k): v for k, v in self._values.items()}
+
+
+class Histogram(object):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Non-cumulative bucket counts, the last slot is +Inf
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {'|'.join(k): [list(v[0]), v[1]] for k, v in self._values.items()}
+
+
+class Metrics(object):
+    """ Registry of counters and histograms plus gauges read on demand.
+
+    Without ``METRICS_DIR`` the ``/metrics`` endpoint reports the answering
+    process only. With it, every worker periodically writes a snapshot of
+    its counters and histograms to ``<METRICS_DIR>/<pid>.json`` and the
+    endpoint sums all snapshots, so any gunicorn worker can be scraped.
+    Snapshots of exited workers are kept so totals never go backwards;
+    clear the directory on deploy.
+    """
+
+    def __init__(self, app=None):
+        self.metrics = {}
+        self.collectors = {}
+        self.directory = None
+        self.interval = 5.0
+        self._thread = None
+        self._pid = None
+        self.request_latency = self.histogram(
+            'auth_request_duration_seconds', 'Request latency per API endpoint', ('endpoint', 'method'))
+        self.db_latency = self.histogram('auth_db_query_duration_seconds', 'Database statement latency')
+        self.tokens_issued = self.counter('auth_tokens_issued_total', 'Tokens issued')
+        self.tokens_validated = self.counter('auth_tokens_validated_total', 'Tokens validated successfully')
+        self.token_misses = self.counter('auth_token_misses_total', 'Token lookups that found no valid token')
+        self.logins_throttled = self.counter('auth_logins_throttled_total', 'Logins rejected by the rate limiter')
+        if app is not None:
+            self.init_app(app)
+
+    def counter(self, name, documentation, labels=()):
+        return self.metrics.setdefault(name, Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, documentation, labels, buckets))
+
+    def add_stats(self, prefix, stats):
+        """ Export every numeric value of ``stats()`` as a ``<prefix>_<key>`` gauge """
+        self.collectors[prefix] = stats
+
+    def init_app(self, app):
+        self.directory = app.config['METRICS_DIR']
+        self.interval = app.config['METRICS_FLUSH_INTERVAL']
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self.flush)
+        app.before_request(self._begin)
+        app.after_request(self._end)
+        app.add_url_rule('/metrics', 'metrics', self.export, methods=['GET'])
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor)
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_metrics_started')
+        if started:
+            self.db_latency.observe(time.perf_counter() - started.pop())
+
+    def _begin(self):
+        g._metrics_started = time.perf_counter()
+        self._ensure_flusher()
+
+    def _end(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None and request.endpoint is not None:
+            self.request_latency.observe(time.perf_counter() - started, request.endpoint, request.method)
+        return response
+
+    def _ensure_flusher(self):
+        # One flusher thread per worker process, started after the fork
+        if self.directory and self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """ Atomically write this process' snapshot into the shared directory """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def _aggregate(self):
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, series in snapshot.items():
+                target = merged.setdefault(name, {})
+                for key, value in series.items():
+                    if key not in target:
+                        target[key] = value
+                    elif isinstance(value, list):
+                        counts = [a + b for a, b in zip(target[key][0], value[0])]
+                        target[key] = [counts, target[key][1] + value[1]]
+                    else:
+                        target[key] += value
+        return merged
+
+    def render(self) -> str:
+        lines = []
+        aggregated = self._aggregate()
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(aggregated.get(name, {}).items()):
+                labels = tuple(key.split('|')) if metric.labels else ()
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{_labels(metric.labels, labels)} {value}')
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    le = _labels(metric.labels + ('le',), labels + (bound,))
+                    lines.append(f'{name}_bucket{le} {cumulative}')
+                lines.append(f'{name}_sum{_labels(metric.labels, labels)} {total}')
+                lines.append(f'{name}_count{_labels(metric.labels, labels)} {cumulative}')
+        # Gauges from stats() callables describe the answering process only
+        pid = _labels(('pid',), (os.getpid(),))
+        for prefix, stats in self.collectors.items():
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key}{pid} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+''' Connection pool statistics and pre-warming '''
+
+
+class PoolMonitor(object):
+    """ Measure how long requests wait for a pooled database connection.
+
+    The pool's checkout (``_do_get``, shared by every way of connecting) is
+    wrapped on the engine's pool, and again whenever the engine is disposed
+    and builds a new pool, to time checkouts and count pool timeouts. Gauges come straight from the pool itself.
+    """
+
+    def __init__(self, db, app=None):
+        self.db = db
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        with app.app_context():
+            self.attach(self.db.engine)
+            self.prewarm(app.config['DB_POOL_PREWARM'])
+
+    def attach(self, engine):
+        self.engine = engine
+        self._wrap(engine.pool)
+        if not event.contains(engine, 'engine_disposed', self._on_dispose):
+            event.listen(engine, 'engine_disposed', self._on_dispose)
+
+    def _on_dispose(self, engine):
+        self._wrap(engine.pool)
+
+    def _wrap(self, pool):
+        if getattr(pool, '_monitored', False):
+            return
+        checkout = pool._do_get
+
+        def timed_checkout():
+            started = time.perf_counter()
+            try:
+                return checkout()
+            except PoolTimeout:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                wait = time.perf_counter() - started
+                with self._lock:
+                    self.checkouts += 1
+                    self.wait_seconds += wait
+                    self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+        pool._do_get = timed_checkout
+        pool._monitored = True
+
+    def prewarm(self, count):
+        """ Open ``count`` connections now so the first requests don't pay for them """
+        if not count or self.engine is None:
+            return
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(self.engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def stats(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        stats = {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': self.wait_seconds,
+            'max_wait_seconds': self.max_wait_seconds,
+        }
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            gauge = getattr(pool, name, None)
+            if callable(gauge):
+                stats[name] = gauge()
+        return stats
@@ -0,0 +1,31 @@
+import ipaddress
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+''' X-Forwarded-For handling limited to known proxies '''
+
+
+class TrustedProxyFix(object):
+    """ Apply :class:`ProxyFix` only to requests coming from ``networks``.
+
+    A client reaching the service directly keeps its own address, so it
+    can't pick a new login throttling bucket per request by sending its
+    own X-Forwarded-For.
+    """
+
+    def __init__(self, app, networks, x_for=1):
+        self.app = app
+        self.proxied = ProxyFix(app, x_for=x_for)
+        self.networks = [ipaddress.ip_network(network, strict=False) for network in networks]
+
+    def trusted(self, address: str) -> bool:
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def __call__(self, environ, start_response):
+        if self.trusted(environ.get('REMOTE_ADDR', '')):
+            return self.proxied(environ, start_response)
+        return self.app(environ, start_response)
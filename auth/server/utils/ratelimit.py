@@ -0,0 +1,94 @@
+import hashlib
+import time
+from typing import Optional
+
+''' Login throttling on shared cache counters '''
+
+
+class LoginLimiter(object):
+    """ Limit failed logins per email and per client IP.
+
+    Each key gets one counter per ``LOGIN_RATE_WINDOW`` seconds. The rate
+    is estimated from the current and previous windows, the previous one
+    weighted by how much of it still overlaps a sliding window, which
+    behaves like a token bucket refilling ``limit`` tokens per window
+    without a read-modify-write.
+
+    ``check`` reads all four counters with one multi-get before any
+    database lookup or password hash, the only round trip a login waits
+    for. Failed attempts are charged with
+    :meth:`~server.utils.sharding.ShardedMemcachedCache.inc_noreply` where
+    the backend has it, so nothing waits for an answer. Other backends,
+    tests use the simple cache, are charged with blocking calls.
+    """
+
+    def __init__(self, cache, app=None):
+        self.cache = cache
+        self.enabled = False
+        self.window = 300
+        self.limits = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config['LOGIN_RATE_LIMIT_ENABLED']
+        self.window = app.config['LOGIN_RATE_WINDOW']
+        self.limits = {'email': app.config['LOGIN_RATE_PER_EMAIL'], 'ip': app.config['LOGIN_RATE_PER_IP']}
+
+    def _subjects(self, email, ip):
+        email = hashlib.sha1((email or '').strip().lower().encode('utf-8')).hexdigest()[:20]
+        return [('email', email), ('ip', ip or 'unknown')]
+
+    def _key(self, kind, subject, index):
+        return f'rl:{kind}:{subject}:{index}'
+
+    def check(self, email: str, ip: str, now: Optional[float] = None) -> Optional[int]:
+        """ Seconds until the next attempt is allowed, None if allowed now """
+        if not self.enabled:
+            return None
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, self.window)
+        index = int(index)
+        subjects = self._subjects(email, ip)
+        keys = []
+        for kind, subject in subjects:
+            keys += [self._key(kind, subject, index - 1), self._key(kind, subject, index)]
+        values = self.cache.get_many(*keys)
+        retry_after = None
+        for i, (kind, _) in enumerate(subjects):
+            wait = self._wait(int(values[2 * i] or 0), int(values[2 * i + 1] or 0), elapsed, self.limits[kind])
+            if wait is not None:
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+    def _wait(self, previous, current, elapsed, limit) -> Optional[int]:
+        if limit <= 0:  # 0 turns the limit off
+            return None
+        weight = 1 - elapsed / self.window
+        if previous * weight + current < limit:
+            return None
+        if current < limit:
+            # The previous window's share decays below the remaining allowance
+            wait = self.window * (1 - (limit - current) / previous) - elapsed
+        else:
+            # Wait for this window to become "previous" and decay enough
+            wait = self.window - elapsed + self.window * (1 - limit / current)
+        # First whole second at which the estimate is strictly below the limit
+        return int(wait) + 1
+
+    def charge(self, email: str, ip: str, now: Optional[float] = None):
+        """ Count a failed attempt against the email and the IP """
+        if not self.enabled:
+            return
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        backend = self.cache.cache
+        # Kept for two windows, the next one reads it as "previous"
+        timeout = 2 * self.window
+        inc_noreply = getattr(backend, 'inc_noreply', None)
+        for kind, subject in self._subjects(email, ip):
+            key = self._key(kind, subject, index)
+            if inc_noreply is not None:
+                inc_noreply(key, timeout=timeout)
+            elif backend.inc(key) is None and not self.cache.add(key, 1, timeout=timeout):
+                backend.inc(key)
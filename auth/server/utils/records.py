@@ -0,0 +1,69 @@
+import struct
+import time
+from typing import NamedTuple, Optional
+
+''' Compact, versioned token records stored in the cache '''
+
+RECORD_VERSION = 3
+
+# version, user id, issued at (epoch seconds), email length
+_HEADER_V1 = struct.Struct('>BQIH')
+# version, user id, issued at, session generation, email length
+_HEADER_V2 = struct.Struct('>BQIIH')
+# version, user id, issued at, session generation, expires at, email length
+_HEADER_V3 = struct.Struct('>BQIIIH')
+
+
+class TokenRecord(NamedTuple):
+    user_id: int
+    email: str
+    issued_at: int
+    version: int = RECORD_VERSION
+    # User's session generation at issue time, None for v1 records
+    generation: Optional[int] = 0
+    # Current expiry (epoch seconds), moved forward on refresh; None before v3
+    expires_at: Optional[int] = 0
+
+    @classmethod
+    def from_user(cls, user, issued_at: Optional[int] = None, generation: int = 0,
+                  expires_at: int = 0) -> 'TokenRecord':
+        """ Build a record from anything exposing `id` and `email` """
+        if issued_at is None:
+            issued_at = int(time.time())
+        return cls(user_id=user.id, email=user.email, issued_at=issued_at, generation=generation,
+                   expires_at=expires_at)
+
+    @property
+    def id(self) -> int:
+        return self.user_id
+
+
+def encode_record(record: TokenRecord) -> bytes:
+    """ Serialize a record into its fixed-layout binary form """
+    email = record.email.encode('utf-8')
+    header = _HEADER_V3.pack(RECORD_VERSION, record.user_id, record.issued_at, record.generation or 0,
+                             record.expires_at or 0, len(email))
+    return header + email
+
+
+def decode_record(raw: bytes) -> TokenRecord:
+    """ Parse a binary record, raising ValueError if it is malformed """
+    if not isinstance(raw, (bytes, bytearray)) or not raw:
+        raise ValueError('Token record must be non-empty bytes')
+    version = raw[0]
+    header = {1: _HEADER_V1, 2: _HEADER_V2, 3: _HEADER_V3}.get(version)
+    if header is None:
+        raise ValueError(f'Unknown token record version: {version}')
+    if len(raw) < header.size:
+        raise ValueError('Truncated token record')
+    generation = expires_at = None
+    if version == 1:
+        _, user_id, issued_at, length = header.unpack_from(raw)
+    elif version == 2:
+        _, user_id, issued_at, generation, length = header.unpack_from(raw)
+    else:
+        _, user_id, issued_at, generation, expires_at, length = header.unpack_from(raw)
+    email = bytes(raw[header.size:header.size + length])
+    if len(email) != length:
+        raise ValueError('Truncated token record')
+    return TokenRecord(user_id, email.decode('utf-8'), issued_at, version, generation, expires_at)
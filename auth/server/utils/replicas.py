@@ -0,0 +1,112 @@
+import threading
+import time
+from itertools import count
+
+from flask import g, has_app_context
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+''' Read-only query routing to database replicas '''
+
+STRATEGIES = ('round_robin', 'least_connections')
+
+
+class Replica(object):
+    def __init__(self, uri, engine):
+        self.uri = uri
+        self.engine = engine
+        self.session = sessionmaker(bind=engine)
+        self.active = 0
+        self.reads = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def healthy(self, now) -> bool:
+        return self.down_until <= now
+
+
+class ReplicaRouter(object):
+    """ Send read-only lookups to ``SQLALCHEMY_REPLICA_URIS``.
+
+    Replicas are picked round-robin or by fewest reads in flight in this
+    process. Reads go to the primary when no replica is configured, after
+    the current request (or app context) wrote through the primary, so a
+    request always sees its own writes, and when every replica is cooling
+    down after a connection failure. A failing replica is skipped for
+    ``REPLICA_RETRY_AFTER`` seconds and the read is retried on the primary.
+    """
+
+    def __init__(self, db, app=None):
+        self.db = db
+        self.replicas = []
+        self.strategy = STRATEGIES[0]
+        self.retry_after = 30.0
+        self.primary_reads = 0
+        self._turn = count()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        for replica in self.replicas:
+            replica.engine.dispose()
+        self.strategy = app.config['REPLICA_STRATEGY']
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f'REPLICA_STRATEGY must be one of: {", ".join(STRATEGIES)}')
+        self.retry_after = app.config['REPLICA_RETRY_AFTER']
+        self.primary_reads = 0
+        self._turn = count()
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        self.replicas = [Replica(uri, create_engine(uri, **options)) for uri in app.config['SQLALCHEMY_REPLICA_URIS']]
+        with app.app_context():
+            engine = self.db.engine
+        if not event.contains(engine, 'before_cursor_execute', self._on_execute):
+            event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and (context.isinsert or context.isupdate or context.isdelete) \
+                and has_app_context():
+            g._replica_wrote = True
+
+    def _choose(self):
+        if not self.replicas or (has_app_context() and g.get('_replica_wrote')):
+            return None
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.healthy(now)]
+        if not healthy:
+            return None
+        if self.strategy == 'least_connections':
+            return min(healthy, key=lambda replica: replica.active)
+        return healthy[next(self._turn) % len(healthy)]
+
+    def read(self, query):
+        """ Run ``query(session)`` on a replica, or on the primary session """
+        replica = self._choose()
+        if replica is not None:
+            with self._lock:
+                replica.active += 1
+            session = replica.session()
+            try:
+                result = query(session)
+                replica.reads += 1
+                return result
+            except DBAPIError:
+                replica.failures += 1
+                replica.down_until = time.monotonic() + self.retry_after
+            finally:
+                session.close()
+                with self._lock:
+                    replica.active -= 1
+        self.primary_reads += 1
+        return query(self.db.session)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'replicas': len(self.replicas),
+            'healthy': sum(replica.healthy(now) for replica in self.replicas),
+            'replica_reads': sum(replica.reads for replica in self.replicas),
+            'replica_failures': sum(replica.failures for replica in self.replicas),
+            'primary_reads': self.primary_reads,
+        }
@@ -0,0 +1,120 @@
+import json
+
+import flask_restful
+from flask import request
+
+from server.utils import wire
+
+''' Request schemas compiled once, a lean stand-in for reqparse.RequestParser '''
+
+MISSING = 'Missing required parameter in the JSON body or the post body or the query string'
+MISSING_JSON = 'Missing required parameter in the JSON body'
+
+
+class Field(object):
+    """ One request argument, mirroring the ``add_argument`` options used here
+
+    Values are read from the JSON body first, then the query string and
+    form, and are converted with ``str`` like reqparse's default type.
+    """
+    __slots__ = ('name', 'required', 'trim', 'help', 'choices', 'append', 'json_only', 'missing')
+
+    def __init__(self, name, required=False, trim=False, help=None, choices=None, action='store',
+                 location=None):
+        self.name = name
+        self.required = required
+        self.trim = trim
+        self.help = help
+        self.choices = tuple(choices) if choices else None
+        self.append = action == 'append'
+        self.json_only = location == 'json'
+        self.missing = MISSING_JSON if self.json_only else MISSING
+
+    def _error(self, message):
+        return self.help.format(error_msg=message) if self.help else message
+
+    def convert(self, value):
+        """ Returns ``(value, error)`` for a single raw value """
+        if value is None:  # reqparse arguments are nullable by default
+            return None, None
+        if self.trim and hasattr(value, 'strip'):
+            value = value.strip()
+        value = str(value)
+        if self.choices and value not in self.choices:
+            return None, self._error(f'{value} is not a valid choice')
+        return value, None
+
+
+class RequestSchema(object):
+    """ Parse arguments for an endpoint, bundling every validation error
+
+    Errors abort with the same 400 ``{"message": {name: help}}`` body that
+    ``RequestParser(bundle_errors=True)`` produces.
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+
+    @staticmethod
+    def body(req) -> dict:
+        """ Decode a JSON or MessagePack body straight from the raw bytes """
+        packed = req.mimetype == wire.MSGPACK
+        if not packed and not req.is_json:
+            return {}
+        cached = getattr(req, '_schema_body', None)
+        if cached is not None:
+            return cached
+        if packed and wire.msgpack is None:
+            flask_restful.abort(415, message='MessagePack bodies are not supported')
+        data = req.get_data(cache=True)
+        try:
+            if packed:
+                body = wire.msgpack.unpackb(data, raw=False) if data else {}
+            else:
+                body = json.loads(data) if data else {}
+        except ValueError as e:
+            kind = 'MessagePack' if packed else 'JSON'
+            flask_restful.abort(400, message=f'Failed to decode {kind} object: {str(e) or type(e).__name__}')
+        if not isinstance(body, dict):
+            body = {}
+        req._schema_body = body
+        return body
+
+    def parse_args(self, req=None) -> dict:
+        if req is None:
+            req = request._get_current_object()
+        body = self.body(req)
+        args, errors = {}, {}
+        for field in self.fields:
+            name = field.name
+            if field.append:
+                raw = body.get(name, [])
+                raw = list(raw) if isinstance(raw, list) else [raw]
+                if not field.json_only:
+                    raw += req.values.getlist(name)
+            elif name in body:
+                raw = [body[name]]
+            elif field.json_only:
+                raw = []
+            else:
+                raw = req.values.getlist(name)
+
+            if not raw:
+                if field.required:
+                    errors[name] = field._error(field.missing)
+                args[name] = None
+                continue
+
+            values = []
+            for value in raw:
+                value, error = field.convert(value)
+                if error is not None:
+                    errors[name] = error
+                    break
+                values.append(value)
+            else:
+                args[name] = values if field.append else values[0]
+
+        if errors:
+            flask_restful.abort(400, message=errors)
+        return args
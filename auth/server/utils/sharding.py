@@ -0,0 +1,213 @@
+import bisect
+import hashlib
+import time
+from collections import defaultdict
+
+import memcache
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.memcache import MemcachedCache
+
+''' Token store sharded over several memcached nodes '''
+
+# Stored in place of deleted keys, no token record starts with a zero byte
+TOMBSTONE = b'\x00deleted'
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:4], 'little')
+
+
+class HashRing(object):
+    """ Ketama-style consistent hash ring.
+
+    Every node is placed at ``points`` positions taken from MD5 digests of
+    its name and a key belongs to the first node clockwise from the key's
+    own hash, so adding or removing one of N nodes only moves the keys on
+    the arcs it gains or loses, about 1/N of them.
+    """
+
+    def __init__(self, nodes, points=160):
+        self.nodes = list(dict.fromkeys(nodes))
+        ring = []
+        for node in self.nodes:
+            for i in range(points // 4):
+                digest = hashlib.md5(f'{node}-{i}'.encode('utf-8')).digest()
+                # Four points per digest, as in libketama
+                ring += [(int.from_bytes(digest[j:j + 4], 'little'), node) for j in range(0, 16, 4)]
+        ring.sort()
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def iter_nodes(self, key):
+        """ Distinct nodes in ring order, starting with the owner of ``key`` """
+        if not self._points:
+            return
+        start = bisect.bisect(self._points, _hash(key))
+        seen = set()
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+
+    def get_node(self, key):
+        return next(self.iter_nodes(key), None)
+
+
+class ShardedMemcachedCache(BaseCache):
+    """ Flask-Caching backend spreading keys over ``CACHE_MEMCACHED_SERVERS``.
+
+    Each key is written to the first ``CACHE_REPLICAS`` live nodes of its
+    place on a :class:`HashRing`. A node that fails is marked dead by its
+    client for ``CACHE_DEAD_RETRY`` seconds and skipped, so the next node
+    on the ring takes its keys meanwhile.
+
+    A node that was unreachable for a moment can come back with values
+    written before it left. Deletes therefore store a tombstone on every
+    copy, kept for ``CACHE_TOMBSTONE_TIMEOUT`` (the longest any token can
+    still live), and reads fetch every live copy: a tombstone on any of
+    them wins, counters take the highest value and otherwise the first
+    copy found is returned. A node that comes back empty is covered the
+    same way. Every read, single keys included, is one multi-get per node
+    holding a copy: ``CACHE_REPLICAS`` round trips for one key, at most one
+    per node for many. Trusting the first owner alone would let a node
+    that missed a delete answer with the old value. With a single copy a
+    node that drops out for a moment takes the only tombstone with it, so
+    several nodes need at least two replicas.
+
+        CACHE_TYPE = 'server.utils.sharding.ShardedMemcachedCache'
+    """
+
+    def __init__(self, servers, default_timeout=300, key_prefix=None, replicas=2, dead_retry=30,
+                 socket_timeout=3, tombstone_timeout=None):
+        super(ShardedMemcachedCache, self).__init__(default_timeout)
+        self.ring = HashRing(servers)
+        if replicas < 2 and len(self.ring.nodes) > 1:
+            raise ValueError('CACHE_REPLICAS must be at least 2 when sharding over several memcached nodes, '
+                             'a single copy loses deletes when its node drops out')
+        self.replicas = max(1, min(replicas, len(self.ring.nodes)))
+        self.tombstone_timeout = tombstone_timeout or default_timeout
+        self.key_prefix = key_prefix or ''
+        self.clients = {
+            server: memcache.Client([server], dead_retry=dead_retry, socket_timeout=socket_timeout)
+            for server in self.ring.nodes
+        }
+        self.nodes = {
+            server: MemcachedCache(client, default_timeout=default_timeout, key_prefix=key_prefix)
+            for server, client in self.clients.items()
+        }
+        self.failovers = 0
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        args.append(config['CACHE_MEMCACHED_SERVERS'])
+        kwargs.update(dict(
+            key_prefix=config['CACHE_KEY_PREFIX'],
+            replicas=config.get('CACHE_REPLICAS', 2),
+            dead_retry=config.get('CACHE_DEAD_RETRY', 30),
+            socket_timeout=config.get('CACHE_SOCKET_TIMEOUT', 3),
+            tombstone_timeout=config.get('CACHE_TOMBSTONE_TIMEOUT'),
+        ))
+        return cls(*args, **kwargs)
+
+    def alive(self, server) -> bool:
+        host = self.clients[server].servers[0]
+        return host.deaduntil <= time.time()
+
+    def owners(self, key):
+        owners = []
+        for server in self.ring.iter_nodes(str(key)):
+            if self.alive(server):
+                owners.append(server)
+                if len(owners) == self.replicas:
+                    break
+        return owners
+
+    def _merge(self, copies):
+        """ One value from every node's copy of a key, in ring order """
+        found = [value for value in copies if value is not None]
+        if not found or any(value == TOMBSTONE for value in found):
+            return None
+        self.failovers += copies[0] is None
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in found):
+            return max(found)
+        return found[0]
+
+    def get(self, key):
+        return self.get_dict(key)[key]
+
+    def get_dict(self, *keys):
+        """ One multi-get per node covering every copy of ``keys`` """
+        owners = {key: self.owners(key) for key in dict.fromkeys(keys)}
+        batches = defaultdict(list)
+        for key, servers in owners.items():
+            for server in servers:
+                batches[server].append(key)
+        fetched = {server: self.nodes[server].get_dict(*batch) for server, batch in batches.items()}
+        return {key: self._merge([fetched[server][key] for server in servers]) for key, servers in owners.items()}
+
+    def get_many(self, *keys):
+        values = self.get_dict(*keys)
+        return [values[key] for key in keys]
+
+    def _write(self, method, key, *args):
+        return [getattr(self.nodes[server], method)(key, *args) for server in self.owners(key)]
+
+    def set(self, key, value, timeout=None):
+        return any(self._write('set', key, value, timeout))
+
+    def add(self, key, value, timeout=None):
+        added = False
+        for server in self.owners(key):
+            node = self.nodes[server]
+            # A tombstone doesn't count as an existing value
+            if node.add(key, value, timeout) or (node.get(key) == TOMBSTONE and node.set(key, value, timeout)):
+                added = True
+        return added
+
+    def set_many(self, mapping, timeout=None):
+        return all([self.set(key, value, timeout) for key, value in dict(mapping).items()])
+
+    def delete(self, key):
+        """ Replace every copy with a tombstone, a node that missed it can't revive the value """
+        return any(self._write('set', key, TOMBSTONE, self.tombstone_timeout))
+
+    def delete_many(self, *keys):
+        return all([self.delete(key) for key in keys])
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def inc(self, key, delta=1):
+        """ Increment every copy, the highest new value is returned """
+        return max((value for value in self._write('inc', key, delta) if value is not None), default=None)
+
+    def inc_noreply(self, key, delta=1, timeout=None):
+        """ Create the counter if missing and increment every copy, without waiting for replies.
+
+        ``add`` then ``incr`` go out in order on each node's connection and
+        both are atomic on the server, so concurrent callers never lose an
+        increment. Nothing is returned, the new value is never read.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        name = self.key_prefix + key
+        for server in self.owners(key):
+            client = self.clients[server]
+            client.add(name, 0, timeout, noreply=True)
+            client.incr(name, delta, noreply=True)
+
+    def dec(self, key, delta=1):
+        return max((value for value in self._write('dec', key, delta) if value is not None), default=None)
+
+    def clear(self):
+        return all([node.clear() for node in self.nodes.values()])
+
+    def stats(self) -> dict:
+        return {
+            'nodes': len(self.nodes),
+            'alive': sum(self.alive(server) for server in self.nodes),
+            'replicas': self.replicas,
+            'failovers': self.failovers,
+        }
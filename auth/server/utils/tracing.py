@@ -0,0 +1,132 @@
+import hmac
+import random
+import threading
+import time
+from collections import deque
+
+from flask import g, request, jsonify, abort
+
+''' Sampled per-request tracing kept in an in-memory ring buffer '''
+
+SECRETS = frozenset(('password', 'password_hash'))
+TOKENS = frozenset(('token', 'tokens'))
+
+
+def redact(key, value):
+    """ Never keep secrets, and only a short prefix of tokens """
+    if key in SECRETS:
+        return '[redacted]'
+    if key in TOKENS:
+        if isinstance(value, (list, tuple)):
+            return [redact(key, item) for item in value]
+        return f'{str(value)[:6]}...' if value else value
+    return value
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span(object):
+    __slots__ = ('trace', 'name', 'attrs', 'started')
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        finished = time.perf_counter()
+        span = {
+            'name': self.name,
+            'offset_ms': (self.started - self.trace['_started']) * 1000,
+            'duration_ms': (finished - self.started) * 1000,
+        }
+        if exc_type is not None:
+            span['error'] = exc_type.__name__
+        span.update((key, redact(key, value)) for key, value in self.attrs.items())
+        self.trace['spans'].append(span)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer(object):
+    """ Record spans for a sampled fraction of requests.
+
+    ``TRACE_SAMPLE_RATE`` picks the fraction of requests traced; at 0 no
+    request hooks are installed and ``span()`` returns a shared no-op.
+    Finished traces go to a ring buffer of ``TRACE_BUFFER_SIZE`` entries,
+    readable at ``/admin/traces`` with the ``X-Admin-Token`` header.
+    """
+
+    def __init__(self, app=None):
+        self.rate = 0.0
+        self.admin_token = None
+        self.traces = deque(maxlen=256)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rate = app.config['TRACE_SAMPLE_RATE']
+        self.admin_token = app.config['ADMIN_TOKEN']
+        self.traces = deque(maxlen=app.config['TRACE_BUFFER_SIZE'])
+        if self.rate > 0:
+            app.before_request(self._begin)
+            app.after_request(self._end)
+        app.add_url_rule('/admin/traces', 'traces', self.dump, methods=['GET'])
+
+    def span(self, name, **attrs):
+        if not self.rate:
+            return NOOP_SPAN
+        trace = g.get('_trace')
+        if trace is None:
+            return NOOP_SPAN
+        return Span(trace, name, attrs)
+
+    def _begin(self):
+        if random.random() < self.rate:
+            g._trace = {
+                '_started': time.perf_counter(),
+                'timestamp': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'spans': [],
+            }
+
+    def _end(self, response):
+        trace = g.pop('_trace', None)
+        if trace is not None:
+            trace['duration_ms'] = (time.perf_counter() - trace.pop('_started')) * 1000
+            trace['status'] = response.status_code
+            with self._lock:
+                self.traces.append(trace)
+        return response
+
+    def dump(self):
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not self.admin_token or not hmac.compare_digest(supplied, self.admin_token):
+            abort(403)
+        with self._lock:
+            traces = list(self.traces)
+        return jsonify(sample_rate=self.rate, traces=traces)
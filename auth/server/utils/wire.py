@@ -0,0 +1,19 @@
+from flask import make_response
+
+try:
+    import msgpack
+except ImportError:  # optional, the API only speaks JSON without it
+    msgpack = None
+
+''' MessagePack as a compact alternative to JSON on the wire '''
+
+MSGPACK = 'application/msgpack'
+
+
+def output_msgpack(data, code, headers=None):
+    """ flask-restful representation picked for ``Accept: application/msgpack`` """
+    res = make_response(msgpack.packb(data, use_bin_type=True), code)
+    res.headers.extend(headers or {})
+    res.mimetype = MSGPACK
+    return res
+
@@ -0,0 +1,170 @@
+import atexit
+import os
+import threading
+import time
+
+''' Write-behind buffer that group-commits rows as multi-row inserts '''
+
+DURABILITY = ('enqueue', 'commit')
+
+
+class BufferFull(Exception):
+    """ Raised when the write-behind buffer can't take more rows """
+
+
+class _Pending(object):
+    __slots__ = ('row', 'done', 'error')
+
+    def __init__(self, row):
+        self.row = row
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteBehindBuffer(object):
+    """ Collect rows for ``model`` and insert them in batches.
+
+    A batch is flushed once ``WRITE_BEHIND_BATCH_SIZE`` rows are waiting or
+    the oldest row has waited ``WRITE_BEHIND_FLUSH_MS``, whichever comes
+    first. Callers pick their durability: ``enqueue`` returns as soon as
+    the row is buffered, ``commit`` waits for the group commit holding it,
+    at most ``WRITE_BEHIND_FLUSH_MS`` plus ``WRITE_BEHIND_STATEMENT_TIMEOUT``
+    (also applied to the insert on PostgreSQL) before reporting a failure.
+    A row given up on this way may still be committed afterwards. With
+    write-behind disabled every row is committed on its own.
+    """
+
+    def __init__(self, db, model, app=None):
+        self.db = db
+        self.model = model
+        self.app = None
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 0.05
+        self.max_rows = 10000
+        self.durability = 'commit'
+        self.statement_timeout = 5.0
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.timeouts = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['WRITE_BEHIND_ENABLED']
+        self.batch_size = app.config['WRITE_BEHIND_BATCH_SIZE']
+        self.flush_interval = app.config['WRITE_BEHIND_FLUSH_MS'] / 1000.0
+        self.max_rows = app.config['WRITE_BEHIND_MAX_ROWS']
+        self.durability = app.config['WRITE_BEHIND_DURABILITY']
+        self.statement_timeout = app.config['WRITE_BEHIND_STATEMENT_TIMEOUT']
+        self._stopping = False
+        if self.enabled:
+            atexit.register(self.shutdown)
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, start one lazily in every worker
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            if self._pid != os.getpid():
+                self._buffer = []
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def submit(self, durability=None, **row) -> bool:
+        """ Store a row, returning False if its commit failed """
+        durability = durability or self.durability
+        if not self.enabled:
+            return self._write_one(row)
+        pending = _Pending(row)
+        with self._cond:
+            if len(self._buffer) >= self.max_rows or self._stopping:
+                raise BufferFull()
+            self._ensure_thread()
+            self._buffer.append(pending)
+            # Wake the flusher to start the batch timer or flush a full batch
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        if durability == 'enqueue':
+            return True
+        # Bounded, a stalled database or a dead flusher must not hang the request
+        if not pending.done.wait(self.flush_interval + self.statement_timeout):
+            self.timeouts += 1
+            self.app.logger.error(f"Write-behind commit of {self.model.__name__} timed out")
+            return False
+        return pending.error is None
+
+    def _write_one(self, row) -> bool:
+        session = self.db.session
+        session.add(self.model(**row))
+        try:
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.failures += 1
+            self.app.logger.error(f"Write of {self.model.__name__} failed: {e}")
+            return False
+        self.rows_written += 1
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._buffer and not self._stopping:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._buffer) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                stop = self._stopping and not self._buffer
+            if batch:
+                self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        error = None
+        try:
+            with self.app.app_context():
+                with self.db.engine.begin() as connection:
+                    if connection.dialect.name == 'postgresql':
+                        connection.execute(f'SET LOCAL statement_timeout = {int(self.statement_timeout * 1000)}')
+                    connection.execute(self.model.__table__.insert(), [p.row for p in batch])
+            self.flushes += 1
+            self.rows_written += len(batch)
+        except Exception as e:
+            self.failures += 1
+            error = e
+            self.app.logger.error(f"Write-behind flush of {len(batch)} rows failed: {e}")
+        for pending in batch:
+            pending.error = error
+            pending.done.set()
+
+    def shutdown(self, timeout=None):
+        """ Stop accepting rows and drain everything still buffered """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'buffered': len(self._buffer),
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+        }
@@ -0,0 +1,179 @@
+""" In-process stand-in for memcached speaking the text protocol
+
+Enough of the protocol for python-memcached as used through Flask-Caching:
+get/gets, set/add/replace, delete, incr/decr, touch, flush_all, version.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+# Expiry times above 30 days are absolute unix timestamps
+RELATIVE_LIMIT = 60 * 60 * 24 * 30
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.server.owner.connections.add(self.connection)
+
+    def finish(self):
+        self.server.owner.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        server: FakeMemcached = self.server.owner
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                return
+            if not line:
+                return
+            parts = line.decode().split()
+            if not parts:
+                continue
+            command, args = parts[0], parts[1:]
+            if command == 'quit':
+                return
+            if command in ('set', 'add', 'replace'):
+                key, flags, exptime, length = args[0], int(args[1]), int(args[2]), int(args[3])
+                data = self.rfile.read(length + 2)[:-2]
+                stored = server.store(command, key, flags, exptime, data)
+                reply = b'STORED' if stored else b'NOT_STORED'
+            elif command in ('get', 'gets'):
+                reply = b''.join(
+                    b'VALUE %s %d %d\r\n%s\r\n' % (key.encode(), flags, len(data), data)
+                    for key, (flags, data) in server.get_many(args).items()
+                ) + b'END'
+            elif command == 'delete':
+                reply = b'DELETED' if server.delete(args[0]) else b'NOT_FOUND'
+            elif command in ('incr', 'decr'):
+                value = server.incr(args[0], int(args[1]) * (1 if command == 'incr' else -1))
+                reply = b'NOT_FOUND' if value is None else str(value).encode()
+            elif command == 'touch':
+                reply = b'TOUCHED' if server.touch(args[0], int(args[1])) else b'NOT_FOUND'
+            elif command == 'flush_all':
+                server.flush()
+                reply = b'OK'
+            elif command == 'version':
+                reply = b'VERSION fake'
+            else:
+                reply = b'ERROR'
+            if args and args[-1] == 'noreply':
+                server.noreplies += 1
+                continue
+            self.wfile.write(reply + b'\r\n')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeMemcached(object):
+    """ A memcached server on a loopback port, served from a thread
+
+        with FakeMemcached() as server:
+            mode = type('Mode', (config.Testing,), {
+                'CACHE_TYPE': 'memcached', 'CACHE_MEMCACHED_SERVERS': [server.address]})
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.items = {}
+        self.commands = 0
+        self.noreplies = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.owner = self
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address
+        return f'{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name='fake-memcached',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stop listening and drop open connections, clients see the node go down """
+        self._server.shutdown()
+        self._server.server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _expires(self, exptime):
+        if exptime == 0:
+            return None
+        if exptime < 0:
+            return 0
+        return exptime if exptime > RELATIVE_LIMIT else time.time() + exptime
+
+    def _live(self, key):
+        item = self.items.get(key)
+        if item is not None and item[2] is not None and item[2] <= time.time():
+            del self.items[key]
+            return None
+        return item
+
+    def store(self, command, key, flags, exptime, data) -> bool:
+        with self._lock:
+            self.commands += 1
+            exists = self._live(key) is not None
+            if (command == 'add' and exists) or (command == 'replace' and not exists):
+                return False
+            self.items[key] = (flags, data, self._expires(exptime))
+            return True
+
+    def get_many(self, keys) -> dict:
+        with self._lock:
+            self.commands += 1
+            found = {}
+            for key in keys:
+                item = self._live(key)
+                if item is not None:
+                    found[key] = item[:2]
+            return found
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            self.commands += 1
+            return self._live(key) is not None and self.items.pop(key) is not None
+
+    def incr(self, key, delta):
+        with self._lock:
+            self.commands += 1
+            item = self._live(key)
+            if item is None:
+                return None
+            # Like memcached, decrementing below zero stops at zero
+            value = max(int(item[1]) + delta, 0)
+            self.items[key] = (item[0], str(value).encode(), item[2])
+            return value
+
+    def touch(self, key, exptime) -> bool:
+        with self._lock:
+            self.commands += 1
+            item = self._live(key)
+            if item is None:
+                return False
+            self.items[key] = (item[0], item[1], self._expires(exptime))
+            return True
+
+    def flush(self):
+        with self._lock:
+            self.items.clear()
@@ -0,0 +1,150 @@
+import struct
+from unittest import TestCase
+from unittest.mock import patch
+
+from server import create_app, config
+from server.resources import cache
+
+
+class TestBatchAuthentication(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.client = self.app.test_client()
+        res = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'})
+        self.token, self.expires_at = res.json['token'], res.json['expires_at']
+
+    def test_batch(self):
+        res = self.client.post('/api/auth/batch', json={'tokens': [self.token, 'unknown']})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json['results'], [
+            {'token': self.token, 'valid': True, 'email': 'e@a.tu', 'expires_at': self.expires_at},
+            {'token': 'unknown', 'valid': False},
+        ])
+
+    def test_batch_null_tokens(self):
+        res = self.client.post('/api/auth/batch', json={'tokens': [None, '', self.token]})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([result['valid'] for result in res.json['results']], [False, False, True])
+        self.assertEqual(res.json['results'][0]['token'], None)
+
+    def test_batch_too_large(self):
+        tokens = [self.token] * (self.app.config['AUTH_BATCH_MAX_SIZE'] + 1)
+        res = self.client.post('/api/auth/batch', json={'tokens': tokens})
+
+        self.assertEqual(res.status_code, 413)
+
+
+class TestRevokeSessions(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.client = self.app.test_client()
+        self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'})
+
+    def login(self):
+        return self.client.post('/api/auth', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+
+    def valid(self, token):
+        return self.client.get('/api/auth', json={'token': token}).status_code == 200
+
+    def test_revoke_all(self):
+        first, second = self.login(), self.login()
+        res = self.client.delete('/api/auth', json={'token': first, 'scope': 'all'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(self.valid(first) or self.valid(second))
+        res = self.client.post('/api/auth/batch', json={'tokens': [first, second]})
+        self.assertEqual([r['valid'] for r in res.json['results']], [False, False])
+        self.assertTrue(self.valid(self.login()))
+
+    def test_signed_tokens(self):
+        self.app.config['TOKEN_MODE'] = 'signed'
+        token = self.login()
+        self.client.delete('/api/auth', json={'token': token, 'scope': 'all'})
+
+        self.assertFalse(self.valid(token))
+
+    def test_login_after_revoke_elsewhere_with_l1(self):
+        app = create_app(mode=type('Mode', (config.Testing,), {'TOKEN_L1_ENABLED': True}))
+        client = app.test_client()
+        token = client.post('/api/user', json={'email': 'l1@a.tu', 'password': 'x'}).json['token']
+        self.assertEqual(client.get('/api/auth', json={'token': token}).status_code, 200)
+        with app.app_context():
+            # Revoke-all on another worker, this one still holds the old counter in L1
+            cache.cache.inc('gen:1')
+
+        fresh = client.post('/api/auth', json={'email': 'l1@a.tu', 'password': 'x'}).json['token']
+        self.assertEqual(client.get('/api/auth', json={'token': fresh}).status_code, 200)
+
+    def test_missing_generation_fails_closed(self):
+        token = self.login()
+        cache.clear()
+        self.app.config['TOKEN_MODE'] = 'signed'
+        signed = self.login()
+        cache.delete('gen:1')
+
+        self.assertFalse(self.valid(token))
+        self.assertFalse(self.valid(signed))
+
+    def test_v1_records_until_first_generation(self):
+        cache.delete('gen:1')
+        cache.set('legacy', struct.pack('>BQIH', 1, 1, 1600000000, 6) + b'e@a.tu')
+
+        self.assertTrue(self.valid('legacy'))
+        self.login()
+        self.assertFalse(self.valid('legacy'))
+
+
+class TestRefresh(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.client = self.app.test_client()
+        res = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'})
+        self.token, self.expires_at = res.json['token'], res.json['expires_at']
+
+    def refresh(self, token, **kwargs):
+        return self.client.put('/api/auth', json=dict(kwargs, token=token))
+
+    @patch('server.utils.functions.time.time')
+    def test_extends_in_place(self, now):
+        now.return_value = self.expires_at - 10
+        res = self.refresh(self.token)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json['token'], self.token)
+        self.assertEqual(res.json['expires_at'], self.expires_at - 10 + self.app.config['TOKEN_TIMEOUT'])
+        check = self.client.get('/api/auth', json={'token': self.token})
+        self.assertEqual(check.json['expires_at'], res.json['expires_at'])
+
+    def test_rotate(self):
+        res = self.refresh(self.token, rotate=True)
+
+        self.assertNotEqual(res.json['token'], self.token)
+        self.assertEqual(self.client.get('/api/auth', json={'token': res.json['token']}).status_code, 200)
+        self.assertEqual(self.client.get('/api/auth', json={'token': self.token}).status_code, 401)
+
+    @patch('server.utils.functions.time.time')
+    def test_signed_rotates(self, now):
+        self.app.config['TOKEN_MODE'] = 'signed'
+        now.return_value = self.expires_at - self.app.config['TOKEN_TIMEOUT']
+        token = self.client.post('/api/auth', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+        now.return_value += 60
+        res = self.refresh(token)
+
+        self.assertNotEqual(res.json['token'], token)
+        self.assertEqual(self.client.get('/api/auth', json={'token': res.json['token']}).status_code, 200)
+        self.assertEqual(self.client.get('/api/auth', json={'token': token}).status_code, 401)
+
+    @patch('server.utils.functions.time.time')
+    def test_max_lifetime(self, now):
+        self.app.config['TOKEN_MAX_LIFETIME'] = self.app.config['TOKEN_TIMEOUT'] + 100
+        now.return_value = self.expires_at - 50
+        res = self.refresh(self.token)
+        self.assertEqual(res.json['expires_at'], self.expires_at + 100)
+
+        now.return_value = self.expires_at + 100
+        self.assertEqual(self.refresh(self.token).status_code, 401)
+
+    def test_unknown(self):
+        self.assertEqual(self.refresh('unknown').status_code, 401)
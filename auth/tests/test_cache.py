@@ -0,0 +1,36 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from server.utils.cache import LocalCache
+
+
+class TestLocalCache(TestCase):
+    def setUp(self) -> None:
+        self.cache = LocalCache(max_entries=2, ttl=5)
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    @patch('server.utils.cache.time.monotonic')
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 100
+        self.cache.set("a", 1, ttl=60)
+        monotonic.return_value = 104
+        self.assertEqual(self.cache.get("a"), 1)
+        monotonic.return_value = 105
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_counters(self):
+        self.cache.set("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
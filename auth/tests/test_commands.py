@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import user_store
+
+
+class TestUsersCommands(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.client = self.app.test_client()
+        self.runner = self.app.test_cli_runner(mix_stderr=False)
+        self.client.post('/api/user', json={'email': 'old@a.tu', 'password': 'x'})
+
+    def write(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def emails(self):
+        with self.app.app_context():
+            return sorted(user.email for user in user_store.user_model.query.all())
+
+    def test_import_csv(self):
+        path = self.write('.csv', 'email,password\nnew@a.tu,x\nold@a.tu,x\n,x\nother@a.tu\n')
+
+        res = self.runner.invoke(args=['users', 'import', path, '--workers', '1'])
+
+        self.assertEqual(res.exit_code, 0, res.output)
+        self.assertIn('1 created, 1 duplicates, 2 rejected, 4 read', res.stdout)
+        self.assertIn('duplicate: old@a.tu', res.stderr)
+        self.assertIn('rejected: line 4', res.stderr)
+        self.assertIn('rejected: line 5', res.stderr)
+        self.assertEqual(self.emails(), ['new@a.tu', 'old@a.tu'])
+
+    def test_import_ndjson(self):
+        rows = [{'email': 'a@a.tu', 'password': 'x'}, {'password': 'x'}, {'email': 'b@a.tu', 'password': 'y'}]
+        path = self.write('.ndjson', '\n'.join(map(json.dumps, rows)) + '\nnot json\n')
+
+        res = self.runner.invoke(args=['users', 'import', path, '--workers', '1', '--chunk-size', '2'])
+
+        self.assertEqual(res.exit_code, 0, res.output)
+        self.assertIn('2 created, 0 duplicates, 2 rejected', res.stdout)
+        self.assertEqual(self.emails(), ['a@a.tu', 'b@a.tu', 'old@a.tu'])
+        login = self.client.post('/api/auth', json={'email': 'b@a.tu', 'password': 'y'})
+        self.assertEqual(login.status_code, 200)
+
+    def test_revoke(self):
+        token = self.client.post('/api/auth', json={'email': 'old@a.tu', 'password': 'x'}).json['token']
+
+        res = self.runner.invoke(args=['users', 'revoke', 'old@a.tu'])
+
+        self.assertEqual(res.exit_code, 0, res.output)
+        self.assertEqual(self.client.get('/api/auth', json={'token': token}).status_code, 401)
+
+    def test_revoke_unknown_user(self):
+        res = self.runner.invoke(args=['users', 'revoke', 'nobody@a.tu'])
+
+        self.assertEqual(res.exit_code, 1)
+        self.assertIn('No user with email nobody@a.tu', res.stderr)
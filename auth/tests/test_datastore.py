@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from sqlalchemy import event
+
+from server import create_app, config
+from server.resources import user_store, db
+
+
+class TestCreateUsers(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self) -> None:
+        self.context.pop()
+
+    def test_bulk_with_duplicates(self):
+        user_store.create_user(email="old@a.tu", password_hash="h")
+        user_store.commit()
+
+        created, duplicates = user_store.create_users([
+            {'email': "new@a.tu", 'password_hash': "h"},
+            {'email': "old@a.tu", 'password_hash': "h"},
+            {'email': "new@a.tu", 'password_hash': "h", 'active': True},
+        ])
+        user_store.commit()
+
+        self.assertEqual((created, duplicates), (["new@a.tu"], ["old@a.tu", "new@a.tu"]))
+        self.assertIsNotNone(user_store.find_user(email="new@a.tu"))
+
+    def test_bulk_is_one_executemany(self):
+        for email in ("b@a.tu", "d@a.tu"):
+            user_store.create_user(email=email, password_hash="h")
+        user_store.commit()
+        inserts = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT'):
+                inserts.append(executemany)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            created, duplicates = user_store.create_users(
+                [{'email': f"{name}@a.tu", 'password_hash': "h"} for name in "abcde"])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        user_store.commit()
+
+        self.assertEqual((created, duplicates), (["a@a.tu", "c@a.tu", "e@a.tu"], ["b@a.tu", "d@a.tu"]))
+        self.assertEqual(inserts, [True])
@@ -0,0 +1,98 @@
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from server import create_app, config
+from server.resources import db, text_writer
+from server.resources.models import Text
+
+
+class TestDB(TestCase):
+    write_behind = False
+
+    def setUp(self) -> None:
+        mode = type('Mode', (config.Testing,), {
+            'WRITE_BEHIND_ENABLED': self.write_behind,
+            'WRITE_BEHIND_BATCH_SIZE': 3,
+        })
+        self.app = create_app(mode=mode)
+        self.client = self.app.test_client()
+        self.token = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+
+    def count(self):
+        with self.app.app_context():
+            return db.session.query(Text).count()
+
+    def test_post(self):
+        res = self.client.post('/api/db', json={'token': self.token, 'text': 'hello'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.count(), 1)
+
+
+class TestWriteBehindDB(TestDB):
+    write_behind = True
+
+    def tearDown(self) -> None:
+        text_writer.shutdown()
+
+    def test_enqueue_then_drain(self):
+        for i in range(5):
+            res = self.client.post('/api/db', json={'token': self.token, 'text': str(i), 'durability': 'enqueue'})
+            self.assertEqual(res.status_code, 200)
+        text_writer.shutdown()
+
+        self.assertEqual(self.count(), 5)
+        self.assertEqual(text_writer.stats()['buffered'], 0)
+
+    def test_invalid_durability(self):
+        res = self.client.post('/api/db', json={'token': self.token, 'text': 'x', 'durability': 'never'})
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_commit_wait_is_bounded(self):
+        stalled = threading.Event()
+        text_writer.statement_timeout = 0.1
+        with patch.object(text_writer, '_flush', side_effect=lambda batch: stalled.wait(5)):
+            res = self.client.post('/api/db', json={'token': self.token, 'text': 'x'})
+            stalled.set()
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(text_writer.stats()['timeouts'], 1)
+
+
+class TestReadTexts(TestCase):
+    def setUp(self) -> None:
+        self.client = create_app(mode=config.Testing).test_client()
+        self.token = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+        other = self.client.post('/api/user', json={'email': 'o@a.tu', 'password': 'x'}).json['token']
+        for i in range(5):
+            self.client.post('/api/db', json={'token': self.token, 'text': f'mine {i}'})
+            self.client.post('/api/db', json={'token': other, 'text': f'other {i}'})
+
+    def test_pages(self):
+        texts, after_id = [], None
+        while True:
+            res = self.client.get('/api/db', json={'token': self.token, 'limit': 2, 'after_id': after_id})
+            texts += [text['text'] for text in res.json['texts']]
+            after_id = res.json['next_after_id']
+            if after_id is None:
+                break
+
+        self.assertEqual(texts, [f'mine {i}' for i in range(5)])
+
+    def test_ndjson_stream(self):
+        res = self.client.get('/api/db?format=ndjson', json={'token': self.token})
+        rows = [json.loads(line) for line in res.data.decode().splitlines()]
+
+        self.assertEqual(res.mimetype, 'application/x-ndjson')
+        self.assertEqual([row['text'] for row in rows], [f'mine {i}' for i in range(5)])
+        after = self.client.get('/api/db?format=ndjson', json={'token': self.token, 'after_id': rows[2]['id']})
+        self.assertEqual(len(after.data.decode().splitlines()), 2)
+
+    def test_invalid(self):
+        for args in ({'limit': 0}, {'after_id': 'x'}, {'after_id': -1}, {'after_id': 10 ** 30}, {'limit': 2 ** 63}):
+            with self.subTest(args=args):
+                self.assertEqual(self.client.get('/api/db', json=dict(args, token=self.token)).status_code, 400)
+        self.assertEqual(self.client.get('/api/db', json={'token': 'unknown'}).status_code, 401)
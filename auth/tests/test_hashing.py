@@ -0,0 +1,46 @@
+import time
+from unittest import TestCase
+
+from flask import Flask
+
+from server.utils.hashing import HashingExecutor, HasherBusy
+
+
+class TestHashingExecutor(TestCase):
+    def setUp(self) -> None:
+        app = Flask(__name__)
+        app.config.update(HASH_POOL_WORKERS=0, HASH_QUEUE_DEPTH=0, HASH_TIMEOUT=None)
+        self.hasher = HashingExecutor(app)
+
+    def test_hash_and_check(self):
+        password_hash = self.hasher.generate("secret")
+
+        self.assertTrue(self.hasher.check(password_hash, "secret"))
+        self.assertFalse(self.hasher.check(password_hash, "wrong"))
+        self.assertEqual(self.hasher.stats()["completed"], 3)
+        self.assertGreater(self.hasher.stats()["hash_seconds_total"], 0)
+
+    def test_queue_full(self):
+        self.hasher._slots.acquire()
+
+        self.assertRaises(HasherBusy, lambda: self.hasher.generate("secret"))
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+
+class TestHashingPool(TestCase):
+    def setUp(self) -> None:
+        app = Flask(__name__)
+        app.config.update(HASH_POOL_WORKERS=1, HASH_QUEUE_DEPTH=0, HASH_TIMEOUT=0.05)
+        self.hasher = HashingExecutor(app)
+
+    def tearDown(self) -> None:
+        self.hasher.shutdown()
+
+    def test_timed_out_hash_keeps_its_slot(self):
+        self.assertRaises(HasherBusy, lambda: self.hasher._run(time.sleep, 0.5))
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+        # Still sleeping in the pool, nothing else is admitted
+        self.assertFalse(self.hasher._slots.acquire(blocking=False))
+        time.sleep(1)
+        self.assertIsNone(self.hasher._run(time.sleep, 0))
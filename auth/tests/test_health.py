@@ -0,0 +1,37 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from flask import Flask
+
+from server.utils.health import BackgroundHealthCheck
+
+
+class TestBackgroundHealthCheck(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.app.config.update(HEALTH_CHECK_INTERVAL=3600, HEALTH_CHECK_TTL=30)
+        self.health = BackgroundHealthCheck(self.app, '/status')
+        self.calls = 0
+
+        def probe():
+            self.calls += 1
+            return True, "OK"
+
+        self.health.add_check(probe)
+        self.client = self.app.test_client()
+
+    def test_served_from_memory(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get('/status').status_code, 200)
+
+        self.assertEqual(self.calls, 1)
+
+    @patch('server.utils.health.time.time')
+    def test_stale_result_fails(self, now):
+        now.return_value = 1000
+        self.client.get('/status')
+        now.return_value = 1031
+
+        res = self.client.get('/status')
+        self.assertEqual(res.status_code, 500)
+        self.assertTrue(res.json['results'][0]['output'].startswith('stale'))
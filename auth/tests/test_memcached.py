@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from server import create_app, config
+from tests.memcached import FakeMemcached
+
+
+class TestFakeMemcached(TestCase):
+    def setUp(self) -> None:
+        self.server = FakeMemcached().start()
+        mode = type('Mode', (config.Testing,), {
+            'CACHE_TYPE': 'memcached',
+            'CACHE_MEMCACHED_SERVERS': [self.server.address],
+            'CACHE_KEY_PREFIX': 'bench',
+        })
+        self.client = create_app(mode=mode).test_client()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_token_round_trip(self):
+        token = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+
+        self.assertEqual(self.client.get('/api/auth', json={'token': token}).status_code, 200)
+        self.assertEqual(self.client.delete('/api/auth', json={'token': token}).status_code, 200)
+        self.assertEqual(self.client.get('/api/auth', json={'token': token}).status_code, 401)
+        self.assertGreater(self.server.commands, 0)
+
+    def test_revoke_all(self):
+        token = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+        self.client.delete('/api/auth', json={'token': token, 'scope': 'all'})
+
+        self.assertEqual(self.client.get('/api/auth', json={'token': token}).status_code, 401)
+
+    def test_expiry(self):
+        self.server.store('set', 'k', 0, -1, b'v')
+
+        self.assertEqual(self.server.get_many(['k']), {})
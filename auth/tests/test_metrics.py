@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import metrics
+
+
+class TestMetrics(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        mode = type('Mode', (config.Testing,), {'METRICS_DIR': self.directory})
+        self.client = create_app(mode=mode).test_client()
+
+    def tearDown(self) -> None:
+        metrics.directory = None
+        shutil.rmtree(self.directory)
+
+    def value(self, text, sample):
+        line = next(line for line in text.splitlines() if line.startswith(sample + ' '))
+        return float(line.rsplit(' ', 1)[1])
+
+    def test_endpoint_histogram_and_counters(self):
+        token = self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'}).json['token']
+        before = self.value(self.client.get('/metrics').data.decode(), 'auth_token_misses_total')
+        self.client.get('/api/auth', json={'token': token})
+        self.client.get('/api/auth', json={'token': 'unknown'})
+        text = self.client.get('/metrics').data.decode()
+
+        self.assertGreaterEqual(
+            self.value(text, 'auth_request_duration_seconds_count{endpoint="api.auth",method="GET"}'), 2)
+        self.assertEqual(self.value(text, 'auth_token_misses_total'), before + 1)
+
+    def test_aggregates_worker_snapshots(self):
+        own = self.value(self.client.get('/metrics').data.decode(), 'auth_tokens_issued_total')
+        with open(os.path.join(self.directory, '1.json'), 'w') as f:
+            json.dump({'auth_tokens_issued_total': {'': 5}}, f)
+
+        text = self.client.get('/metrics').data.decode()
+        self.assertEqual(self.value(text, 'auth_tokens_issued_total'), own + 5)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from server import create_app, config
+from server.utils.pool import PoolMonitor
+
+
+class TestPoolMonitor(TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.engine = create_engine(f'sqlite:///{self.path}', poolclass=QueuePool,
+                                    pool_size=2, max_overflow=0, pool_timeout=0.05)
+        self.monitor = PoolMonitor(db=None)
+        self.monitor.attach(self.engine)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_prewarm_and_gauges(self):
+        self.monitor.prewarm(2)
+        stats = self.monitor.stats()
+
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['checkedin'], 2)
+        self.assertEqual(stats['checkedout'], 0)
+
+    def test_counts_timeouts(self):
+        held = [self.engine.connect(), self.engine.connect()]
+        with self.assertRaises(PoolTimeout):
+            self.engine.connect()
+        for connection in held:
+            connection.close()
+
+        stats = self.monitor.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['max_wait_seconds'], 0.05)
+
+    def test_survives_dispose(self):
+        self.engine.dispose()
+        self.engine.connect().close()
+
+        self.assertEqual(self.monitor.stats()['checkouts'], 1)
+
+    def test_exposed_on_env(self):
+        client = create_app(mode=config.Testing).test_client()
+
+        self.assertIn('checkouts', client.get('/env').json['pool'])
+        self.assertIn('auth_db_pool_checkouts', client.get('/metrics').data.decode())
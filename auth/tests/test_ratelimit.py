@@ -0,0 +1,101 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from server import create_app, config
+from server.resources import login_limiter, hasher
+from tests.memcached import FakeMemcached
+
+
+class TestLoginThrottling(TestCase):
+    def setUp(self) -> None:
+        mode = type('Mode', (config.Testing,), {'LOGIN_RATE_PER_EMAIL': 3, 'LOGIN_RATE_PER_IP': 5})
+        self.app = create_app(mode=mode)
+        self.client = self.app.test_client()
+        self.client.post('/api/user', json={'email': 'e@a.tu', 'password': 'x'})
+
+    def login(self, email='e@a.tu', password='wrong', ip='10.0.0.1', forwarded_for=None):
+        headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else None
+        return self.client.post('/api/auth', json={'email': email, 'password': password},
+                                environ_base={'REMOTE_ADDR': ip}, headers=headers)
+
+    def test_email_limit(self):
+        self.assertEqual([self.login().status_code for _ in range(3)], [401] * 3)
+
+        with patch.object(hasher, 'check') as check:
+            res = self.login(password='x')
+        check.assert_not_called()
+        self.assertEqual(res.status_code, 429)
+        self.assertGreater(int(res.headers['Retry-After']), 0)
+        self.assertEqual(self.login(email='other@a.tu', ip='10.0.0.2').status_code, 401)
+
+    def test_ip_limit(self):
+        for i in range(5):
+            self.login(email=f'u{i}@a.tu')
+
+        self.assertEqual(self.login(email='fresh@a.tu').status_code, 429)
+        self.assertEqual(self.login(password='x', ip='10.0.0.2').status_code, 200)
+
+    def test_forwarded_for_trusted_from_the_web_tier_only(self):
+        for i in range(5):
+            self.login(email=f'u{i}@a.tu', ip='203.0.113.7', forwarded_for=f'198.51.100.{i}')
+        self.assertEqual(self.login(email='fresh@a.tu', ip='203.0.113.7', forwarded_for='198.51.100.9').status_code,
+                         429)
+
+        for i in range(5):
+            self.login(email=f'v{i}@a.tu', forwarded_for=f'198.51.100.{i}')
+        self.assertEqual(self.login(email='other@a.tu', forwarded_for='198.51.100.9').status_code, 401)
+
+    def test_success_not_charged(self):
+        for _ in range(5):
+            self.assertEqual(self.login(password='x').status_code, 200)
+
+    def test_sliding_window(self):
+        window = self.app.config['LOGIN_RATE_WINDOW']
+        with self.app.app_context():
+            for _ in range(4):
+                login_limiter.charge('e@a.tu', 'ip', now=window + 10)
+            retry_after = login_limiter.check('e@a.tu', 'ip', now=window + 10)
+
+            # Four failures in the previous window still count while most of it overlaps
+            self.assertIsNotNone(login_limiter.check('e@a.tu', 'ip', now=2 * window + 10))
+            self.assertIsNone(login_limiter.check('e@a.tu', 'ip', now=window + 10 + retry_after))
+
+
+class TestMemcachedLimiter(TestCase):
+    cache_type = 'server.utils.sharding.ShardedMemcachedCache'
+
+    def setUp(self) -> None:
+        self.server = FakeMemcached().start()
+        mode = type('Mode', (config.Testing,), {
+            'CACHE_TYPE': self.cache_type, 'CACHE_MEMCACHED_SERVERS': [self.server.address],
+            'CACHE_KEY_PREFIX': 'rl', 'LOGIN_RATE_PER_EMAIL': 2,
+        })
+        self.app = create_app(mode=mode)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_one_round_trip_and_non_blocking_charges(self):
+        with self.app.app_context():
+            before = self.server.commands
+            self.assertIsNone(login_limiter.check('e@a.tu', 'ip', now=1000))
+            self.assertEqual(self.server.commands - before, 1)
+
+            login_limiter.charge('e@a.tu', 'ip', now=1000)
+            login_limiter.charge('e@a.tu', 'ip', now=1000)
+            self.assertIsNotNone(login_limiter.check('e@a.tu', 'ip', now=1000))
+            # add + incr for the email and the IP counters, no reply waited for
+            self.assertEqual(self.server.noreplies, 8)
+
+
+class TestPlainMemcachedLimiter(TestMemcachedLimiter):
+    cache_type = 'memcached'
+
+    def test_one_round_trip_and_non_blocking_charges(self):
+        with self.app.app_context():
+            login_limiter.charge('e@a.tu', 'ip', now=1000)
+            login_limiter.charge('e@a.tu', 'ip', now=1000)
+
+            # Charged with blocking calls, the count is the same
+            self.assertIsNotNone(login_limiter.check('e@a.tu', 'ip', now=1000))
+            self.assertEqual(self.server.noreplies, 0)
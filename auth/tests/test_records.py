@@ -0,0 +1,34 @@
+import struct
+from unittest import TestCase
+
+from server.utils.records import TokenRecord, encode_record, decode_record
+
+
+class TestTokenRecord(TestCase):
+    def setUp(self) -> None:
+        self.record = TokenRecord(user_id=42, email="e@a.tu", issued_at=1600000000, generation=1700000000,
+                                  expires_at=1600010000)
+
+    def test_round_trip(self):
+        self.assertEqual(decode_record(encode_record(self.record)), self.record)
+
+    def test_unicode_email(self):
+        record = self.record._replace(email="почта@пример.рф")
+        self.assertEqual(decode_record(encode_record(record)), record)
+
+    def test_size(self):
+        self.assertEqual(len(encode_record(self.record)), 23 + len(self.record.email))
+
+    def test_reads_v1(self):
+        raw = struct.pack('>BQIH', 1, 42, 1600000000, 6) + b"e@a.tu"
+        self.assertEqual(decode_record(raw), self.record._replace(version=1, generation=None, expires_at=None))
+
+    def test_reads_v2(self):
+        raw = struct.pack('>BQIIH', 2, 42, 1600000000, 1700000000, 6) + b"e@a.tu"
+        self.assertEqual(decode_record(raw), self.record._replace(version=2, expires_at=None))
+
+    def test_malformed(self):
+        raw = encode_record(self.record)
+        for bad in (b"", raw[:5], raw[:-1], b"\xff" + raw[1:], None):
+            with self.subTest(bad=bad):
+                self.assertRaises(ValueError, lambda: decode_record(bad))
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+
+from server import create_app, config
+from server.resources import db, user_store, replicas
+from server.resources.models import User
+
+
+class TestReplicaRouting(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.replica_uris = [f'sqlite:///{self.directory}/replica{i}.sqlite3' for i in range(2)]
+        for i, uri in enumerate(self.replica_uris):
+            engine = create_engine(uri)
+            db.Model.metadata.create_all(engine)
+            engine.execute(User.__table__.insert(), email=f'r{i}@a.tu', password_hash='x')
+            engine.dispose()
+
+    def tearDown(self) -> None:
+        for replica in replicas.replicas:
+            replica.engine.dispose()
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def make_app(self, uris, **settings):
+        settings.update(SQLALCHEMY_REPLICA_URIS=uris)
+        return create_app(mode=type('Mode', (config.Testing,), settings))
+
+    def found(self, email):
+        return user_store.find_user(email=email) is not None
+
+    def test_round_robin(self):
+        app = self.make_app(self.replica_uris)
+        with app.app_context():
+            self.assertEqual([self.found('r0@a.tu') for _ in range(4)], [True, False, True, False])
+            self.assertEqual(replicas.stats()['replica_reads'], 4)
+
+    def test_read_after_write_goes_to_primary(self):
+        app = self.make_app(self.replica_uris[:1])
+        with app.app_context():
+            self.assertFalse(self.found('new@a.tu'))
+            user_store.insert_user(email='new@a.tu', password_hash='x')
+
+            self.assertTrue(self.found('new@a.tu'))
+            self.assertEqual(replicas.stats()['primary_reads'], 1)
+
+    def test_fallback_when_unhealthy(self):
+        app = self.make_app([f'sqlite:///{self.directory}/missing/replica.sqlite3'])
+        with app.app_context():
+            user_store.insert_user(email='p@a.tu', password_hash='x')
+            db.session.commit()
+        with app.app_context():
+            self.assertTrue(self.found('p@a.tu'))
+            self.assertTrue(self.found('p@a.tu'))
+
+            stats = replicas.stats()
+            self.assertEqual((stats['healthy'], stats['replica_failures'], stats['primary_reads']), (0, 1, 2))
+
+    def test_no_replicas(self):
+        app = self.make_app([])
+        with app.app_context():
+            self.assertFalse(self.found('r0@a.tu'))
+            self.assertEqual(replicas.stats()['replicas'], 0)
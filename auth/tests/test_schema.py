@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from flask import Flask
+from flask_restful import reqparse
+from werkzeug.exceptions import HTTPException
+
+from server.utils.schema import RequestSchema, Field
+
+
+def outcome(parser, **request):
+    app = Flask(__name__)
+    with app.test_request_context('/', **request):
+        try:
+            return dict(parser.parse_args())
+        except HTTPException as e:
+            return e.code, e.data
+
+
+class TestRequestSchema(TestCase):
+    """ Every case must match reqparse.RequestParser(bundle_errors=True) """
+
+    def setUp(self) -> None:
+        self.parser = reqparse.RequestParser(bundle_errors=True)
+        self.parser.add_argument('token', trim=True, required=True, help='Token is required')
+        self.parser.add_argument('mode', choices=('a', 'b'), help='Bad mode')
+        self.parser.add_argument('tags', action='append', location='json', help='Bad tags')
+        self.schema = RequestSchema(
+            Field('token', trim=True, required=True, help='Token is required'),
+            Field('mode', choices=('a', 'b'), help='Bad mode'),
+            Field('tags', action='append', location='json', help='Bad tags'),
+        )
+
+    def test_equivalent(self):
+        cases = {
+            'json': dict(json={'token': ' abc ', 'mode': 'a', 'tags': ['x', 1]}),
+            'query': dict(query_string={'token': 'abc'}),
+            'form': dict(method='POST', data={'token': 'abc', 'mode': 'b'}),
+            'json wins': dict(json={'token': 'json'}, query_string={'token': 'query'}),
+            'number': dict(json={'token': 12}),
+            'missing': dict(json={}),
+            'null': dict(json={'token': None}),
+            'no body': dict(),
+            'bad choice': dict(json={'token': 'abc', 'mode': 'c'}),
+            'bundled': dict(json={'mode': 'c', 'tags': [None]}),
+        }
+        for name, request in cases.items():
+            with self.subTest(name):
+                self.assertEqual(outcome(self.schema, **request), outcome(self.parser, **request))
+
+    def test_invalid_json(self):
+        code, data = outcome(self.schema, data='{', content_type='application/json')
+
+        self.assertEqual(code, 400)
+        self.assertIn('Failed to decode JSON object', data['message'])
@@ -0,0 +1,182 @@
+import os
+from collections import Counter
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import cache
+from server.resources.utils import cache_available
+from server.utils.sharding import HashRing, ShardedMemcachedCache
+from tests.memcached import FakeMemcached
+
+
+class TestHashRing(TestCase):
+    keys = [f'token:{i}' for i in range(10000)]
+
+    def owners(self, ring):
+        return {key: ring.get_node(key) for key in self.keys}
+
+    def test_keys_spread_evenly(self):
+        counts = Counter(self.owners(HashRing(['a:1', 'b:1', 'c:1', 'd:1'])).values())
+
+        self.assertEqual(len(counts), 4)
+        for share in counts.values():
+            self.assertTrue(0.15 < share / len(self.keys) < 0.35, counts)
+
+    def test_adding_node_moves_its_share_only(self):
+        before = self.owners(HashRing(['a:1', 'b:1', 'c:1', 'd:1']))
+        after = self.owners(HashRing(['a:1', 'b:1', 'c:1', 'd:1', 'e:1']))
+        moved = [key for key in self.keys if before[key] != after[key]]
+
+        self.assertTrue(0.1 < len(moved) / len(self.keys) < 0.3, len(moved))
+        self.assertEqual({after[key] for key in moved}, {'e:1'})
+
+    def test_removing_node_moves_its_keys_only(self):
+        before = self.owners(HashRing(['a:1', 'b:1', 'c:1']))
+        after = self.owners(HashRing(['a:1', 'c:1']))
+
+        for key in self.keys:
+            if before[key] != 'b:1':
+                self.assertEqual(before[key], after[key])
+
+    def test_replica_nodes_are_distinct(self):
+        ring = HashRing(['a:1', 'b:1', 'c:1'])
+
+        self.assertEqual(sorted(ring.iter_nodes('token:1')), ['a:1', 'b:1', 'c:1'])
+        self.assertIsNone(HashRing([]).get_node('token:1'))
+
+
+class TestShardedCache(TestCase):
+    replicas = 2
+
+    def setUp(self) -> None:
+        self.servers = [FakeMemcached().start() for _ in range(3)]
+        mode = type('Mode', (config.Testing,), {
+            'CACHE_TYPE': 'server.utils.sharding.ShardedMemcachedCache',
+            'CACHE_MEMCACHED_SERVERS': [server.address for server in self.servers],
+            'CACHE_KEY_PREFIX': 'shard',
+            'CACHE_REPLICAS': self.replicas,
+            # Retry failed nodes right away instead of skipping them
+            'CACHE_DEAD_RETRY': 0,
+            'LOGIN_RATE_LIMIT_ENABLED': False,
+        })
+        self.app = create_app(mode=mode)
+        self.client = self.app.test_client()
+        self.tokens = [
+            self.client.post('/api/user', json={'email': f'user{i}@a.tu', 'password': 'x'}).json['token']
+            for i in range(8)
+        ]
+
+    def tearDown(self) -> None:
+        for server in self.servers:
+            server.stop()
+
+    def stop_busiest(self):
+        """ Stop the node holding the most keys, it holds some of the tokens """
+        server = max(self.servers, key=lambda server: len(server.items))
+        server.stop()
+        return self.servers.index(server)
+
+    def blip(self, key):
+        """ Take down a node holding ``key``, returns a callable bringing it back with its data """
+        index = next(i for i, server in enumerate(self.servers) if 'shard' + key in server.items)
+        server = self.servers[index]
+        server.stop()
+
+        def restore():
+            self.servers[index] = FakeMemcached(*server._server.server_address)
+            self.servers[index].items = server.items
+            self.servers[index].start()
+
+        return restore
+
+    def valid(self):
+        return [self.client.get('/api/auth', json={'token': token}).status_code == 200 for token in self.tokens]
+
+    def test_keys_spread_and_replicated(self):
+        copies = Counter(key for server in self.servers for key in server.items)
+
+        self.assertTrue(all(server.items for server in self.servers))
+        self.assertEqual(set(copies.values()), {self.replicas})
+
+    def test_reads_survive_a_node_going_down(self):
+        self.stop_busiest()
+
+        self.assertTrue(all(self.valid()))
+        with self.app.app_context():
+            self.assertGreater(cache.cache.stats()['failovers'], 0)
+
+    def test_reads_survive_a_node_coming_back_empty(self):
+        index = self.stop_busiest()
+        self.servers[index] = FakeMemcached(*self.servers[index]._server.server_address).start()
+
+        self.assertTrue(all(self.valid()))
+
+    def test_revocation_reaches_every_copy(self):
+        self.client.delete('/api/auth', json={'token': self.tokens[0]})
+        self.stop_busiest()
+
+        self.assertFalse(self.valid()[0])
+
+    def test_logout_during_blip_stays_revoked(self):
+        restore = self.blip(self.tokens[0])
+        self.assertEqual(self.client.delete('/api/auth', json={'token': self.tokens[0]}).status_code, 200)
+        self.assertFalse(self.valid()[0])
+        restore()
+
+        self.assertEqual(self.valid(), [False] + [True] * (len(self.tokens) - 1))
+
+    def test_revoke_all_during_blip_stays_revoked(self):
+        other = self.client.post('/api/auth', json={'email': 'user0@a.tu', 'password': 'x'}).json['token']
+        restore = self.blip('gen:1')
+        self.client.delete('/api/auth', json={'token': self.tokens[0], 'scope': 'all'})
+        restore()
+
+        self.assertEqual(self.client.get('/api/auth', json={'token': other}).status_code, 401)
+        fresh = self.client.post('/api/auth', json={'email': 'user0@a.tu', 'password': 'x'}).json['token']
+        self.assertEqual(self.client.get('/api/auth', json={'token': fresh}).status_code, 200)
+
+    def test_get_reads_each_copy_once(self):
+        with self.app.app_context():
+            backend = cache.cache
+            backend.set('k', 1)
+            before = sum(server.commands for server in self.servers)
+
+            self.assertEqual(backend.get('k'), 1)
+            self.assertEqual(sum(server.commands for server in self.servers) - before, self.replicas)
+
+    def test_noreply_counter_on_every_copy(self):
+        with self.app.app_context():
+            backend = cache.cache
+            backend.inc_noreply('c', timeout=60)
+            backend.inc_noreply('c', timeout=60)
+
+            self.assertEqual(backend.get('c'), 2)
+        self.assertEqual(sum('shardc' in server.items for server in self.servers), self.replicas)
+
+    def test_health_probe_reuses_one_key(self):
+        with self.app.app_context():
+            for _ in range(3):
+                self.assertTrue(cache_available()[0])
+
+        probes = {key for server in self.servers for key in server.items if key.startswith('shardhealth:')}
+        self.assertEqual(probes, {f'shardhealth:{os.getpid()}'})
+
+    def test_multi_get_is_batched_per_node(self):
+        with self.app.app_context():
+            backend = cache.cache
+            keys = [f'k{i}' for i in range(30)]
+            backend.set_many({key: i for i, key in enumerate(keys)})
+            before = [server.commands for server in self.servers]
+
+            self.assertEqual(backend.get_many(*keys), list(range(30)))
+            self.assertEqual([server.commands - count for server, count in zip(self.servers, before)], [1, 1, 1])
+
+
+class TestShardedCacheWithoutReplicas(TestCase):
+    def test_refuses_a_single_copy(self):
+        servers = ['127.0.0.1:1', '127.0.0.1:2']
+
+        with self.assertRaises(ValueError):
+            ShardedMemcachedCache(servers, replicas=1)
+        self.assertEqual(ShardedMemcachedCache(servers[:1], replicas=1).replicas, 1)
+        self.assertEqual(ShardedMemcachedCache(servers[:1]).replicas, 1)
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from flask import Flask
+
+from server.utils.records import TokenRecord
+from server.utils.signing import TokenSigner, is_signed
+
+
+def make_signer(keys, active, mode='signed'):
+    app = Flask(__name__)
+    app.config.update(TOKEN_SIGNING_KEYS=keys, TOKEN_SIGNING_KEY_ID=active, TOKEN_MODE=mode)
+    return TokenSigner(app)
+
+
+class TestTokenSigner(TestCase):
+    def setUp(self) -> None:
+        self.record = TokenRecord(user_id=7, email="e@a.tu", issued_at=1000)
+        self.signer = make_signer({'a': 'first'}, 'a')
+
+    def test_round_trip(self):
+        token = self.signer.sign(self.record, 2000)
+        signed = self.signer.verify(token, now=1500)
+
+        self.assertTrue(is_signed(token))
+        self.assertEqual((signed.record, signed.expires_at), (self.record, 2000))
+
+    def test_expired(self):
+        token = self.signer.sign(self.record, 2000)
+
+        self.assertIsNone(self.signer.verify(token, now=2000))
+
+    def test_tampered(self):
+        token = self.signer.sign(self.record, 2000)
+        prefix, kid, payload, signature = token.split('.')
+        other = self.signer.sign(self.record._replace(user_id=8), 2000).split('.')[2]
+
+        for bad in (f"{prefix}.{kid}.{other}.{signature}", f"{prefix}.b.{payload}.{signature}", token[:-2], "s1.a"):
+            with self.subTest(bad=bad):
+                self.assertIsNone(self.signer.verify(bad, now=1500))
+
+    def test_rotation(self):
+        old = self.signer.sign(self.record, 2000)
+        rotated = make_signer({'a': 'first', 'b': 'second'}, 'b')
+        new = rotated.sign(self.record, 2000)
+
+        self.assertIsNotNone(rotated.verify(old, now=1500))
+        self.assertEqual(new.split('.')[1], 'b')
+        self.assertIsNone(self.signer.verify(new, now=1500))
+
+    def test_signed_mode_needs_shared_key(self):
+        self.assertRaises(ValueError, lambda: make_signer({}, None))
+        self.assertEqual(make_signer({}, None, mode='opaque').keys, {})
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import db
+
+
+class TestProductionStartup(TestCase):
+    def setUp(self) -> None:
+        mode = type('Mode', (config.Testing,), {
+            'DB_CREATE_ALL': False, 'DB_MIGRATIONS': False, 'MONITOR_LAZY': True,
+        })
+        self.app = create_app(mode=mode)
+        self.client = self.app.test_client()
+
+    def test_no_schema_or_migrations(self):
+        with self.app.app_context():
+            self.assertEqual(db.engine.table_names(), [])
+        self.assertNotIn('migrate', self.app.extensions)
+
+    def test_lazy_monitors(self):
+        self.assertEqual(self.client.get('/status').status_code, 200)
+        self.assertIn('pool', self.client.get('/env').json)
+
+    def test_startup_reported(self):
+        startup = self.app.extensions['startup']
+        text = self.client.get('/metrics').data.decode()
+
+        self.assertGreater(startup['import_seconds'], 0)
+        self.assertIn('auth_startup_create_app_seconds', text)
@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import tracer
+from server.utils.tracing import NOOP_SPAN
+
+
+class TestTracing(TestCase):
+    def make_client(self, rate):
+        mode = type('Mode', (config.Testing,), {'TRACE_SAMPLE_RATE': rate, 'ADMIN_TOKEN': 'admin'})
+        return create_app(mode=mode).test_client()
+
+    def traces(self, client):
+        return client.get('/admin/traces', headers={'X-Admin-Token': 'admin'}).json['traces']
+
+    def test_off(self):
+        client = self.make_client(0)
+        client.post('/api/user', json={'email': 'e@a.tu', 'password': 'secret'})
+
+        self.assertIs(tracer.span('parse'), NOOP_SPAN)
+        self.assertEqual(self.traces(client), [])
+
+    def test_sampled_and_redacted(self):
+        client = self.make_client(1.0)
+        token = client.post('/api/user', json={'email': 'e@a.tu', 'password': 'secret'}).json['token']
+        client.get('/api/auth', json={'token': token})
+
+        register, check = self.traces(client)
+        self.assertEqual([span['name'] for span in register['spans']], ['parse', 'hash', 'db_query', 'cache_get', 'cache_set'])
+        self.assertEqual([span['name'] for span in check['spans']], ['parse', 'cache_get', 'cache_get'])
+        self.assertNotIn('secret', str(register))
+        self.assertNotIn(token, str(register) + str(check))
+
+    def test_admin_token_required(self):
+        client = self.make_client(1.0)
+
+        self.assertEqual(client.get('/admin/traces').status_code, 403)
@@ -0,0 +1,37 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from server import create_app, config
+from server.resources import db, user_store
+
+
+class TestRegistration(TestCase):
+    def setUp(self) -> None:
+        # A file database so every thread gets its own connection
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        mode = type('Mode', (config.Testing,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.path}'})
+        self.app = create_app(mode=mode)
+
+    def tearDown(self) -> None:
+        with self.app.app_context():
+            db.engine.dispose()
+        os.remove(self.path)
+
+    def register(self, email):
+        return self.app.test_client().post('/api/user', json={'email': email, 'password': 'x'}).status_code
+
+    def test_duplicate(self):
+        self.assertEqual(self.register('e@a.tu'), 200)
+        self.assertEqual(self.register('e@a.tu'), 401)
+
+    def test_parallel_duplicates(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(self.register, ['same@a.tu'] * 32))
+
+        self.assertEqual(statuses.count(200), 1)
+        self.assertEqual(statuses.count(401), 31)
+        with self.app.app_context():
+            self.assertEqual(user_store.user_model.query.filter_by(email='same@a.tu').count(), 1)
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+import msgpack
+
+from server import create_app, config
+
+MSGPACK = {'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack'}
+
+
+class TestMessagePack(TestCase):
+    def setUp(self) -> None:
+        self.client = create_app(mode=config.Testing).test_client()
+
+    def call(self, method, path, body):
+        res = self.client.open(path, method=method, data=msgpack.packb(body), headers=MSGPACK)
+        self.assertEqual(res.mimetype, 'application/msgpack')
+        return res.status_code, msgpack.unpackb(res.data)
+
+    def test_round_trip(self):
+        status, body = self.call('POST', '/api/user', {'email': 'e@a.tu', 'password': 'x'})
+        self.assertEqual(status, 200)
+
+        status, user = self.call('GET', '/api/auth', {'token': body['token']})
+        self.assertEqual(status, 200)
+        self.assertEqual(user, {'email': 'e@a.tu', 'expires_at': body['expires_at']})
+
+    def test_errors(self):
+        self.assertEqual(self.call('GET', '/api/auth', {}), (400, {'message': {'token': 'Token is required'}}))
+        self.assertEqual(self.call('GET', '/api/auth', {'token': 'nope'})[0], 401)
+
+    def test_malformed_body(self):
+        res = self.client.get('/api/auth', data=b'\xc1', headers=MSGPACK)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('Failed to decode MessagePack object', msgpack.unpackb(res.data)['message'])
+
+    def test_json_by_default(self):
+        token = self.client.post('/api/user', data=msgpack.packb({'email': 'e@a.tu', 'password': 'x'}),
+                                 content_type='application/msgpack').json['token']
+
+        res = self.client.get('/api/auth', json={'token': token})
+        self.assertEqual(res.mimetype, 'application/json')
+        self.assertEqual(res.json['email'], 'e@a.tu')
@@ -1,11 +1,12 @@
+import time
 from functools import wraps
 from typing import Tuple, Optional
 
 import requests
-from flask import render_template, redirect, url_for, request, make_response
+from flask import render_template, redirect, url_for, request, make_response, jsonify, after_this_request
 from werkzeug.wrappers import BaseResponse
 
-from resources import create_app, config
+from resources import create_app, config, auth_client, session_cache, token_verifier, page_cache
 from resources.forms import LoginForm, RegistrationForm, DBForm
 
 app = create_app(mode=config.Development)
@@ -17,13 +18,77 @@ def is_logged_in():
     username can be a list"""
     if "token" not in request.cookies:
         return False
-    data = {'token': request.cookies.get('token')}
-    app.logger.debug(data)
-
-    req = requests.get("http://auth:5050/api/auth", json=data)
+    token = request.cookies.get('token')
+    if token_verifier.accepts(token) and not token_verifier.verify(token):
+        # Forged or expired, no need to ask the auth service
+        return False
+    valid = session_cache.get(token)
+    if valid is not None:
+        return valid
+    try:
+        req = auth_client.validate(token)
+    except requests.RequestException as e:
+        app.logger.warning(f"Auth service unavailable: {e}")
+        return False
     app.logger.debug(req.text)
 
-    return req.status_code == 200
+    valid = req.status_code == 200
+    # Only remember definitive answers, never transient failures
+    if valid:
+        remember_session(token)
+    elif req.status_code == 401:
+        session_cache.set(token, False)
+    return valid
+
+
+def remember_session(token: str):
+    """Remember a token the auth service just vouched for, signed tokens
+    for the whole trust window"""
+    session_cache.set(token, True, ttl=token_verifier.trust_ttl(token))
+
+
+def set_token_cookie(res: BaseResponse, token: str, expires_at: Optional[int] = None):
+    """Keep the cookie exactly as long as the token it holds"""
+    if not expires_at:
+        expires_at = int(time.time()) + app.config['AUTH_TOKEN_TTL']
+    max_age = max(int(expires_at - time.time()), 0)
+    res.set_cookie('token', token, max_age=max_age)
+    res.set_cookie('token_expires', str(expires_at), max_age=max_age)
+
+
+def refresh_if_expiring():
+    """Swap a token that is about to expire for a fresh one,
+    so active users are not sent back to /login"""
+    window = app.config['AUTH_REFRESH_WINDOW']
+    token = request.cookies.get('token')
+    if not window or not token:
+        return
+    if token_verifier.accepts(token):
+        expires_at = token_verifier.expires_at(token)
+    else:
+        try:
+            expires_at = int(request.cookies.get('token_expires', ''))
+        except ValueError:
+            return
+    if expires_at is None or expires_at - time.time() > window:
+        return
+    try:
+        req = auth_client.refresh(token)
+    except requests.RequestException as e:
+        app.logger.warning(f"Auth service unavailable: {e}")
+        return
+    if req.status_code != 200:
+        return
+    refreshed = auth_client.payload(req)
+    if refreshed['token'] != token:
+        # The auth service revoked the old token when it rotated it
+        session_cache.evict(token)
+        remember_session(refreshed['token'])
+
+    @after_this_request
+    def store(res):
+        set_token_cookie(res, refreshed['token'], refreshed.get('expires_at'))
+        return res
 
 
 def login_required(function=None):
@@ -40,6 +105,7 @@ def login_required(function=None):
 
     def dispatch(fun, *args, **kwargs):
         if is_logged_in():
+            refresh_if_expiring()
             return fun(*args, **kwargs)
         else:
             return redirect(url_for('login', next=request.path))
@@ -64,33 +130,43 @@ def login_required(function=None):
     return decorator
 
 
-def login_checker(user: dict) -> Tuple[Optional[str], int]:
+def login_checker(user: dict) -> Tuple[Optional[dict], int]:
     email: str = user.get('email')
     password: str = user.get('password')
 
-    data = {'email': email, 'password': password}
-    req = requests.post("http://auth:5050/api/auth", json=data)
+    try:
+        req = auth_client.login(email, password, client_ip=request.remote_addr)
+    except requests.RequestException as e:
+        app.logger.warning(f"Auth service unavailable: {e}")
+        return None, 503
     app.logger.debug(req.text)
     if req.status_code == 200:
         app.logger.debug("Login successful")
-        return req.json()['token'], 200
+        return auth_client.payload(req), 200
+    if req.status_code == 429:
+        app.logger.warning(f"Login throttled for {request.remote_addr}")
+        return None, 429
     return None, 403
 
 
-def regisr(user: dict) -> Tuple[Optional[str], int]:
+def regisr(user: dict) -> Tuple[Optional[dict], int]:
     email: str = user.get('email')
     password: str = user.get('password')
 
-    data = {'email': email, 'password': password}
-    req = requests.post("http://auth:5050/api/user", json=data)
+    try:
+        req = auth_client.register(email, password)
+    except requests.RequestException as e:
+        app.logger.warning(f"Auth service unavailable: {e}")
+        return None, 503
     app.logger.debug(req.text)
     if req.status_code == 200:
         app.logger.debug("Registration successful")
-        return req.json()['token'], 200
+        return auth_client.payload(req), 200
     return None, 401
 
 
 @app.route('/login', methods=['GET', 'POST'])
+@page_cache.cached
 def login():
     destiny = request.args.get(
         'next',
@@ -103,17 +179,19 @@ def login():
     ret_code = 200
     if form.validate_on_submit():
         app.logger.debug(form.data)
-        token, ret_code = login_checker(form.data)
+        session, ret_code = login_checker(form.data)
         if ret_code == 200:
+            remember_session(session['token'])
             res: BaseResponse = make_response(redirect(destiny))
             app.logger.debug(res.headers)
-            res.set_cookie('token', token, max_age=60 * 60 * 24 * 365 * 2)
+            set_token_cookie(res, session['token'], session.get('expires_at'))
             app.logger.debug(res.headers)
 
             return res
     return render_template('auth/login.html', form=form, next=destiny), ret_code
 
 @app.route('/registration', methods=['GET', 'POST'])
+@page_cache.cached
 def registration():
     destiny = request.args.get(
         'next',
@@ -126,11 +204,12 @@ def registration():
     ret_code = 200
     if form.validate_on_submit():
         app.logger.debug(form.data)
-        token, ret_code = regisr(form.data)
+        session, ret_code = regisr(form.data)
         if ret_code == 200:
+            remember_session(session['token'])
             res: BaseResponse = make_response(redirect(destiny))
             app.logger.debug(res.headers)
-            res.set_cookie('token', token, max_age=60 * 60 * 24 * 365 * 2)
+            set_token_cookie(res, session['token'], session.get('expires_at'))
             app.logger.debug(res.headers)
 
             return res
@@ -138,24 +217,42 @@ def registration():
 
 @app.route('/logout', methods=['GET'])
 def logout():
+    token = request.cookies.get('token')
+    if token:
+        session_cache.evict(token)
+        try:
+            auth_client.logout(token)
+        except requests.RequestException as e:
+            app.logger.warning(f"Auth service unavailable: {e}")
     res: BaseResponse = make_response(redirect("/login"))
     app.logger.debug(res.headers)
     res.set_cookie('token', '', max_age=0)
+    res.set_cookie('token_expires', '', max_age=0)
     app.logger.debug(res.headers)
 
     return res
 
 @app.route('/', methods=['GET', 'POST'])
 @login_required
+@page_cache.private
 def home():
     form = DBForm(meta={'csrf': False})
     if form.validate_on_submit():
-        data = {"text": form.text.data, "token": request.cookies.get("token")}
-        req = requests.post("http://auth:5050/api/db", json=data)
+        try:
+            req = auth_client.post_text(request.cookies.get("token"), form.text.data)
+        except requests.RequestException as e:
+            app.logger.warning(f"Auth service unavailable: {e}")
+            return render_template('index.html', form=form), 503
         if req.status_code != 200:
+            session_cache.evict(request.cookies.get("token"))
             return redirect(url_for('login', next=request.path))
     return render_template('index.html', form=form)
 
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify(session_cache=session_cache.stats(), page_cache=page_cache.stats())
+
+
 if __name__ == '__main__':
     app.run(debug=True)
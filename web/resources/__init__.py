@@ -1,7 +1,21 @@
 from flask import Flask
 
+from resources.auth_client import AuthClient
+from resources.page_cache import PageCache
+from resources.session_cache import SessionCache
+from resources.tokens import TokenVerifier
+
+auth_client = AuthClient()
+session_cache = SessionCache()
+token_verifier = TokenVerifier()
+page_cache = PageCache()
+
 
 def create_app(mode):
     app = Flask(__name__)
     app.config.from_object(mode)
+    auth_client.init_app(app)
+    session_cache.init_app(app)
+    token_verifier.init_app(app)
+    page_cache.init_app(app)
     return app
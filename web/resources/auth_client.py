@@ -0,0 +1,112 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msgpack
+except ImportError:  # optional, calls fall back to JSON
+    msgpack = None
+
+MSGPACK = 'application/msgpack'
+
+
+def _retry_policy(retries: int, backoff: float) -> Retry:
+    """ Retry connection failures and gateway errors for idempotent GETs only """
+    options = dict(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=backoff, status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=frozenset(['GET']), **options)
+    except TypeError:  # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(['GET']), **options)
+
+
+class AuthClient(object):
+    """Pooled keep-alive HTTP client for the auth service.
+
+    Every worker process gets its own ``requests.Session`` so pooled
+    sockets are never shared across a fork. With ``AUTH_WIRE_FORMAT`` set
+    to ``msgpack`` bodies are sent and requested as MessagePack, read the
+    answers with :meth:`payload` whichever format they came back in.
+    """
+
+    def __init__(self, app=None):
+        self.base_url = None
+        self.pool_size = 10
+        self.timeout = (1.0, 5.0)
+        self.retry = _retry_policy(0, 0)
+        self.msgpack = False
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.base_url = app.config['AUTH_SERVICE_URL'].rstrip('/')
+        self.pool_size = app.config['AUTH_POOL_SIZE']
+        self.timeout = (app.config['AUTH_CONNECT_TIMEOUT'], app.config['AUTH_READ_TIMEOUT'])
+        self.retry = _retry_policy(app.config['AUTH_RETRIES'], app.config['AUTH_RETRY_BACKOFF'])
+        self.msgpack = app.config['AUTH_WIRE_FORMAT'] == 'msgpack' and msgpack is not None
+        self._session = None
+        app.extensions['auth_client'] = self
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        max_retries=self.retry,
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None,
+                **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        if self.msgpack:
+            headers = dict(headers or {}, Accept=MSGPACK)
+            if body is not None:
+                headers['Content-Type'] = MSGPACK
+                kwargs['data'] = msgpack.packb(body, use_bin_type=True)
+        elif body is not None:
+            kwargs['json'] = body
+        return self.session.request(method, self.base_url + path, headers=headers, **kwargs)
+
+    @staticmethod
+    def payload(res: requests.Response):
+        """ Decoded body of an auth service response, JSON or MessagePack """
+        if msgpack is not None and res.headers.get('Content-Type', '').startswith(MSGPACK):
+            return msgpack.unpackb(res.content, raw=False)
+        return res.json()
+
+    def validate(self, token: str) -> requests.Response:
+        return self.request('GET', '/api/auth', {'token': token})
+
+    def login(self, email: str, password: str, client_ip: str = None) -> requests.Response:
+        # The auth service throttles failed logins per client IP
+        headers = {'X-Forwarded-For': client_ip} if client_ip else None
+        return self.request('POST', '/api/auth', {'email': email, 'password': password}, headers=headers)
+
+    def refresh(self, token: str) -> requests.Response:
+        return self.request('PUT', '/api/auth', {'token': token})
+
+    def logout(self, token: str) -> requests.Response:
+        return self.request('DELETE', '/api/auth', {'token': token})
+
+    def register(self, email: str, password: str) -> requests.Response:
+        return self.request('POST', '/api/user', {'email': email, 'password': password})
+
+    def post_text(self, token: str, text: str) -> requests.Response:
+        return self.request('POST', '/api/db', {'text': text, 'token': token})
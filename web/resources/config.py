@@ -1,10 +1,43 @@
 import os
 
 
+def signing_keys(spec, fallback):
+    """ Parse ``kid:secret,kid:secret`` into a dict, falling back to a single key """
+    if not spec:
+        return {'0': fallback} if fallback else {}
+    return dict(item.strip().split(':', 1) for item in spec.split(',') if item.strip())
+
+
 class Config(object):
     DEBUG = False
     TESTING = False
     SECRET_KEY = os.urandom(32)
+    # Auth service client
+    AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://auth:5050')
+    AUTH_POOL_SIZE = int(os.getenv('AUTH_POOL_SIZE', 10))
+    AUTH_CONNECT_TIMEOUT = float(os.getenv('AUTH_CONNECT_TIMEOUT', 1.0))
+    AUTH_READ_TIMEOUT = float(os.getenv('AUTH_READ_TIMEOUT', 5.0))
+    AUTH_RETRIES = int(os.getenv('AUTH_RETRIES', 2))
+    AUTH_RETRY_BACKOFF = float(os.getenv('AUTH_RETRY_BACKOFF', 0.1))
+    # "msgpack" or "json" bodies on auth service calls, JSON when msgpack isn't installed
+    AUTH_WIRE_FORMAT = os.getenv('AUTH_WIRE_FORMAT', 'msgpack')
+    # Lifetime of auth service tokens, used for cookies when a response has no expiry
+    AUTH_TOKEN_TTL = int(os.getenv('TOKEN_TIMEOUT', 10000))
+    # Refresh tokens that expire within this many seconds (0 disables)
+    AUTH_REFRESH_WINDOW = int(os.getenv('AUTH_REFRESH_WINDOW', 2500))
+    # Verified-session cache, seconds (0 disables)
+    SESSION_CACHE_TTL = float(os.getenv('SESSION_CACHE_TTL', 5))
+    SESSION_CACHE_NEGATIVE_TTL = float(os.getenv('SESSION_CACHE_NEGATIVE_TTL', 5))
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', 10000))
+    # Rendered anonymous pages, seconds (0 disables)
+    PAGE_CACHE_TTL = float(os.getenv('PAGE_CACHE_TTL', 60))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 256))
+    # Verify the auth service's signed tokens locally (must share its keys)
+    AUTH_VERIFY_LOCALLY = os.getenv('AUTH_VERIFY_LOCALLY', 'false').lower() in ('1', 'true', 'yes', 'on')
+    TOKEN_SIGNING_KEYS = signing_keys(os.getenv('TOKEN_SIGNING_KEYS'), os.getenv('SECRET_KEY'))
+    # Seconds a locally verified token confirmed by the auth service is trusted without asking
+    # again, also how long a token revoked elsewhere keeps working on this worker (0 disables)
+    AUTH_TRUST_WINDOW = float(os.getenv('AUTH_TRUST_WINDOW', 30))
 
 
 class Development(Config):
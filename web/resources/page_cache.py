@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response, Response
+
+
+class PageCache(object):
+    """Per-worker cache of rendered pages for anonymous GETs, with ETags.
+
+    Responses are keyed by endpoint, path and query string and are only
+    stored for requests without a ``token`` cookie, so a signed-in user's
+    page never lands in a shared entry. Every decorated response gets a
+    strong ETag and answers ``If-None-Match`` with ``304 Not Modified``.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 60.0
+        self.max_entries = 256
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['PAGE_CACHE_TTL']
+        self.max_entries = app.config['PAGE_CACHE_MAX_ENTRIES']
+        self.clear()
+        app.extensions['page_cache'] = self
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _set(self, key, res: Response):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, res.get_data(), res.mimetype, res.get_etag()[0])
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _render(self, view, *args, **kwargs) -> Response:
+        started = time.perf_counter()
+        res = make_response(view(*args, **kwargs))
+        self.render_seconds += time.perf_counter() - started
+        self.renders += 1
+        return res
+
+    def _conditional(self, res: Response) -> Response:
+        if res.status_code == 200 and not res.direct_passthrough:
+            if res.get_etag()[0] is None:
+                res.add_etag()
+            res.make_conditional(request)
+            if res.status_code == 304:
+                self.not_modified += 1
+        return res
+
+    def cached(self, view):
+        """Serve anonymous GETs of ``view`` from the shared cache"""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            anonymous = request.method == 'GET' and 'token' not in request.cookies
+            if not anonymous or self.ttl <= 0:
+                return self.private(view)(*args, **kwargs)
+            key = (request.endpoint, request.full_path)
+            entry = self._get(key)
+            if entry is not None:
+                _, body, mimetype, etag = entry
+                res = Response(body, mimetype=mimetype)
+                res.set_etag(etag)
+            else:
+                res = self._render(view, *args, **kwargs)
+                if res.status_code == 200 and 'Set-Cookie' not in res.headers:
+                    res.add_etag()
+                    self._set(key, res)
+            res.cache_control.public = True
+            res.cache_control.max_age = int(self.ttl)
+            res.vary.add('Cookie')
+            return self._conditional(res)
+
+        return wrapper
+
+    def private(self, view):
+        """Add an ETag to ``view``'s responses but keep them out of shared caches"""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            res = self._render(view, *args, **kwargs)
+            if request.method == 'GET':
+                res.cache_control.private = True
+                res.cache_control.no_cache = True
+                res.vary.add('Cookie')
+                return self._conditional(res)
+            return res
+
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'not_modified': self.not_modified,
+            'renders': self.renders,
+            'render_seconds_total': self.render_seconds,
+            'avg_render_ms': self.render_seconds / self.renders * 1000 if self.renders else 0.0,
+        }
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class SessionCache(object):
+    """Per-worker cache of recently validated session tokens.
+
+    Both accepted and rejected tokens are remembered, each with its own
+    short TTL, so repeated page views skip the auth service round trip.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 5.0
+        self.negative_ttl = 5.0
+        self.max_entries = 10000
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['SESSION_CACHE_TTL']
+        self.negative_ttl = app.config['SESSION_CACHE_NEGATIVE_TTL']
+        self.max_entries = app.config['SESSION_CACHE_MAX_ENTRIES']
+        self.clear()
+        app.extensions['session_cache'] = self
+
+    def get(self, token: str) -> Optional[bool]:
+        """ Cached verdict for a token, None when the auth service must be asked """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[token]
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, valid: bool, ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self.ttl if valid else self.negative_ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[token] = (time.monotonic() + ttl, valid)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def evict(self, token: str):
+        with self._lock:
+            self._data.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def saved_round_trips(self) -> int:
+        return self.hits
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'saved_round_trips': self.saved_round_trips,
+        }
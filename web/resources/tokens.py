@@ -0,0 +1,82 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional
+
+TOKEN_PREFIX = 's1'
+
+_EXPIRY = struct.Struct('>I')
+
+
+class TokenVerifier(object):
+    """Verify the auth service's signed ``s1.<kid>.<payload>.<signature>``
+    tokens in-process, using the same ``TOKEN_SIGNING_KEYS``.
+
+    Only the signature and expiry are checked, which turns away forged and
+    expired tokens without a call. Revocation through the auth service's
+    denylist or session generation is not visible here, so a token that
+    passes is confirmed by the auth service and then trusted for
+    ``AUTH_TRUST_WINDOW`` seconds, or until it gets within
+    ``AUTH_REFRESH_WINDOW`` of its expiry. That window is how long a token
+    revoked elsewhere (a logout from another worker, a revoke-all) keeps
+    opening pages on a worker that confirmed it.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.keys = {}
+        self.trust_window = 0
+        self.refresh_window = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config['AUTH_VERIFY_LOCALLY']
+        self.keys = {
+            kid: secret.encode('utf-8') if isinstance(secret, str) else secret
+            for kid, secret in app.config['TOKEN_SIGNING_KEYS'].items()
+        }
+        self.trust_window = app.config['AUTH_TRUST_WINDOW']
+        self.refresh_window = app.config['AUTH_REFRESH_WINDOW']
+        app.extensions['token_verifier'] = self
+
+    def accepts(self, token: str) -> bool:
+        return self.enabled and token.startswith(TOKEN_PREFIX + '.')
+
+    def expires_at(self, token: str, now: Optional[float] = None) -> Optional[int]:
+        """ Token expiry if it is authentic and still valid, otherwise None """
+        try:
+            prefix, kid, payload, signature = token.split('.')
+        except ValueError:
+            return None
+        key = self.keys.get(kid)
+        if prefix != TOKEN_PREFIX or key is None:
+            return None
+        digest = hmac.new(key, f'{prefix}.{kid}.{payload}'.encode('ascii'), hashlib.sha256).digest()
+        expected = base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+        if not hmac.compare_digest(expected, signature):
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+            expires_at, = _EXPIRY.unpack_from(raw)
+        except (ValueError, struct.error):
+            return None
+        if expires_at <= (time.time() if now is None else now):
+            return None
+        return expires_at
+
+    def verify(self, token: str) -> bool:
+        return self.expires_at(token) is not None
+
+    def trust_ttl(self, token: str) -> Optional[float]:
+        """ Seconds the auth service's approval of a signed token can be reused,
+        None when it is not signed or about to expire """
+        if not self.trust_window or not self.accepts(token):
+            return None
+        expires_at = self.expires_at(token)
+        if expires_at is None:
+            return None
+        ttl = min(self.trust_window, expires_at - self.refresh_window - time.time())
+        return ttl if ttl > 0 else None
@@ -0,0 +1,58 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+import msgpack
+
+from resources import create_app, config
+from resources.auth_client import AuthClient
+
+
+class TestAuthClient(TestCase):
+    def setUp(self) -> None:
+        self.app = create_app(mode=config.Testing)
+        self.client = AuthClient(self.app)
+
+    def test_pool(self):
+        adapter = self.client.session.get_adapter(self.client.base_url)
+
+        self.assertEqual(adapter._pool_maxsize, self.app.config['AUTH_POOL_SIZE'])
+        self.assertIs(self.client.session, self.client.session)
+
+    def test_retry_only_get(self):
+        retry = self.client.session.get_adapter(self.client.base_url).max_retries
+
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+
+    @patch('requests.Session.request')
+    def test_timeout(self, request):
+        self.client.validate("token")
+
+        method, url = request.call_args[0]
+        self.assertEqual((method, url), ('GET', 'http://auth:5050/api/auth'))
+        self.assertEqual(request.call_args[1]['timeout'],
+                         (self.app.config['AUTH_CONNECT_TIMEOUT'], self.app.config['AUTH_READ_TIMEOUT']))
+
+    @patch('requests.Session.request')
+    def test_msgpack_body(self, request):
+        self.client.login('e@a.tu', 'x')
+
+        kwargs = request.call_args[1]
+        self.assertEqual(msgpack.unpackb(kwargs['data']), {'email': 'e@a.tu', 'password': 'x'})
+        self.assertEqual(kwargs['headers'], {'Accept': 'application/msgpack', 'Content-Type': 'application/msgpack'})
+
+    @patch('requests.Session.request')
+    def test_json_body(self, request):
+        app = create_app(mode=type('Mode', (config.Testing,), {'AUTH_WIRE_FORMAT': 'json'}))
+        AuthClient(app).login('e@a.tu', 'x', client_ip='10.0.0.1')
+
+        kwargs = request.call_args[1]
+        self.assertEqual(kwargs['json'], {'email': 'e@a.tu', 'password': 'x'})
+        self.assertEqual(kwargs['headers'], {'X-Forwarded-For': '10.0.0.1'})
+
+    def test_payload(self):
+        packed = Mock(headers={'Content-Type': 'application/msgpack'}, content=msgpack.packb({'token': 't'}))
+        plain = Mock(headers={'Content-Type': 'application/json'}, json=Mock(return_value={'token': 't'}))
+
+        self.assertEqual(AuthClient.payload(packed), {'token': 't'})
+        self.assertEqual(AuthClient.payload(plain), {'token': 't'})
@@ -0,0 +1,55 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from app import app
+from resources import page_cache, auth_client
+
+
+class TestPageCache(TestCase):
+    def setUp(self) -> None:
+        page_cache.clear()
+        self.client = app.test_client()
+        self.hits, self.renders = page_cache.hits, page_cache.renders
+
+    def test_anonymous_get_cached(self):
+        first = self.client.get('/login')
+        second = self.client.get('/login')
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.headers['ETag'], second.headers['ETag'])
+        self.assertEqual((page_cache.hits - self.hits, page_cache.renders - self.renders), (1, 1))
+        self.assertIn('public', second.headers['Cache-Control'])
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get('/login')
+        res = self.client.get('/login?next=/elsewhere')
+
+        self.assertIn(b'/elsewhere', res.data)
+        self.assertEqual(page_cache.renders - self.renders, 2)
+
+    def test_not_modified(self):
+        etag = self.client.get('/registration').headers['ETag']
+        res = self.client.get('/registration', headers={'If-None-Match': etag})
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b'')
+
+    @patch.object(auth_client, 'validate')
+    def test_authenticated_pages_are_private(self, validate):
+        validate.return_value = Mock(status_code=200, text="")
+        self.client.set_cookie('localhost', 'token', 'secret')
+        self.client.set_cookie('localhost', 'token_expires', '4000000000')
+
+        login = self.client.get('/login')
+        home = self.client.get('/')
+        again = self.client.get('/', headers={'If-None-Match': home.headers['ETag']})
+
+        self.assertEqual(len(page_cache._data), 0)
+        self.assertIn('private', login.headers['Cache-Control'])
+        self.assertIn('private', home.headers['Cache-Control'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_stats(self):
+        self.client.get('/login')
+
+        self.assertIn('hit_rate', self.client.get('/stats').json['page_cache'])
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from app import app, is_logged_in
+from resources import session_cache, auth_client
+
+
+class TestSessionCache(TestCase):
+    def setUp(self) -> None:
+        session_cache.clear()
+        self.hits = session_cache.hits
+
+    def _check(self, token):
+        with app.test_request_context('/', headers={'Cookie': f'token={token}'}):
+            return is_logged_in()
+
+    @patch.object(auth_client, 'validate')
+    def test_positive(self, validate):
+        validate.return_value = Mock(status_code=200, text="")
+
+        self.assertTrue(self._check("good"))
+        self.assertTrue(self._check("good"))
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(session_cache.saved_round_trips - self.hits, 1)
+
+    @patch.object(auth_client, 'validate')
+    def test_negative(self, validate):
+        validate.return_value = Mock(status_code=401, text="")
+
+        self.assertFalse(self._check("bad"))
+        self.assertFalse(self._check("bad"))
+        self.assertEqual(validate.call_count, 1)
+
+    @patch.object(auth_client, 'validate')
+    def test_transient_failure_not_cached(self, validate):
+        validate.return_value = Mock(status_code=503, text="")
+
+        self.assertFalse(self._check("flaky"))
+        self.assertFalse(self._check("flaky"))
+        self.assertEqual(validate.call_count, 2)
+
+    @patch.object(auth_client, 'logout')
+    @patch.object(auth_client, 'validate')
+    def test_logout_evicts(self, validate, logout):
+        validate.return_value = Mock(status_code=200, text="")
+        self._check("gone")
+
+        with app.test_client() as client:
+            client.set_cookie('localhost', 'token', 'gone')
+            client.get('/logout')
+
+        self.assertIsNone(session_cache.get("gone"))
+        logout.assert_called_once_with("gone")
@@ -0,0 +1,53 @@
+import time
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from app import app
+from resources import session_cache, auth_client
+
+
+class TestTokenRefresh(TestCase):
+    def setUp(self) -> None:
+        session_cache.clear()
+        self.client = app.test_client()
+
+    def visit(self, expires_in):
+        self.client.set_cookie('localhost', 'token', 'old')
+        self.client.set_cookie('localhost', 'token_expires', str(int(time.time() + expires_in)))
+        return self.client.get('/')
+
+    @patch.object(auth_client, 'refresh')
+    @patch.object(auth_client, 'validate')
+    def test_refreshes_close_to_expiry(self, validate, refresh):
+        validate.return_value = Mock(status_code=200, text="")
+        expires_at = int(time.time()) + 10000
+        refresh.return_value = Mock(status_code=200, headers={},
+                                    json=Mock(return_value={'token': 'new', 'expires_at': expires_at}))
+
+        res = self.visit(60)
+
+        refresh.assert_called_once_with('old')
+        cookies = res.headers.getlist('Set-Cookie')
+        self.assertTrue(any(c.startswith('token=new;') for c in cookies))
+        self.assertTrue(any(c.startswith(f'token_expires={expires_at};') for c in cookies))
+        self.assertTrue(session_cache.get('new'))
+
+    @patch.object(auth_client, 'refresh')
+    @patch.object(auth_client, 'validate')
+    def test_leaves_fresh_tokens(self, validate, refresh):
+        validate.return_value = Mock(status_code=200, text="")
+
+        res = self.visit(app.config['AUTH_REFRESH_WINDOW'] + 600)
+
+        refresh.assert_not_called()
+        self.assertEqual(res.headers.getlist('Set-Cookie'), [])
+
+    @patch.object(auth_client, 'login')
+    def test_cookie_follows_token_expiry(self, login):
+        login.return_value = Mock(status_code=200, text="", headers={},
+                                  json=Mock(return_value={'token': 't', 'expires_at': int(time.time()) + 600}))
+
+        res = self.client.post('/login', data={'email': 'e@a.tu', 'password': 'x'})
+
+        cookie = next(c for c in res.headers.getlist('Set-Cookie') if c.startswith('token=t;'))
+        self.assertTrue('Max-Age=600' in cookie or 'Max-Age=599' in cookie)
@@ -0,0 +1,93 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from app import app
+from resources import session_cache, auth_client, token_verifier
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def sign(expires_at, key=b'secret'):
+    message = f"s1.0.{_b64(struct.pack('>I', expires_at) + b'record')}"
+    return f"{message}.{_b64(hmac.new(key, message.encode('ascii'), hashlib.sha256).digest())}"
+
+
+class TestLocalVerification(TestCase):
+    def setUp(self) -> None:
+        session_cache.clear()
+        self.client = app.test_client()
+        self.enabled, self.keys = token_verifier.enabled, token_verifier.keys
+        self.trust_window = token_verifier.trust_window
+        token_verifier.enabled, token_verifier.keys = True, {'0': b'secret'}
+
+    def tearDown(self) -> None:
+        token_verifier.enabled, token_verifier.keys = self.enabled, self.keys
+        token_verifier.trust_window = self.trust_window
+
+    def visit(self, token):
+        self.client.set_cookie('localhost', 'token', token)
+        self.client.set_cookie('localhost', 'token_expires', str(int(time.time()) + 10000))
+        return self.client.get('/')
+
+    @patch.object(auth_client, 'validate')
+    def test_forged_token_skips_auth_service(self, validate):
+        res = self.visit(sign(int(time.time()) + 10000, key=b'forged'))
+
+        self.assertEqual(res.status_code, 302)
+        validate.assert_not_called()
+
+    @patch.object(auth_client, 'validate')
+    def test_revoked_token_is_rejected(self, validate):
+        validate.return_value = Mock(status_code=401, text="")
+
+        self.assertEqual(self.visit(sign(int(time.time()) + 10000)).status_code, 302)
+        validate.assert_called_once()
+
+    @patch.object(auth_client, 'validate')
+    def test_valid_token_checked_once_per_ttl(self, validate):
+        validate.return_value = Mock(status_code=200, text="")
+        token = sign(int(time.time()) + 10000)
+
+        self.assertEqual(self.visit(token).status_code, 200)
+        self.assertEqual(self.visit(token).status_code, 200)
+        validate.assert_called_once_with(token)
+
+    @patch.object(auth_client, 'validate')
+    def test_confirmed_token_trusted_for_window(self, validate):
+        validate.return_value = Mock(status_code=200, text="")
+        token_verifier.trust_window = 30
+        token = sign(int(time.time()) + 10000)
+        self.visit(token)
+
+        with patch('resources.session_cache.time.monotonic', return_value=time.monotonic() + 20):
+            self.assertEqual(self.visit(token).status_code, 200)
+        self.assertEqual(validate.call_count, 1)
+        with patch('resources.session_cache.time.monotonic', return_value=time.monotonic() + 40):
+            self.assertEqual(self.visit(token).status_code, 200)
+        self.assertEqual(validate.call_count, 2)
+
+    def test_no_trust_close_to_expiry(self):
+        token_verifier.trust_window = 30
+
+        self.assertIsNone(token_verifier.trust_ttl(sign(int(time.time()) + token_verifier.refresh_window - 10)))
+        self.assertEqual(token_verifier.trust_ttl(sign(int(time.time()) + 10000)), 30)
+        self.assertIsNone(token_verifier.trust_ttl('opaque'))
+
+    @patch.object(auth_client, 'validate')
+    @patch.object(auth_client, 'login')
+    def test_login_skips_first_check(self, login, validate):
+        token_verifier.trust_window = 30
+        token = sign(int(time.time()) + 10000)
+        login.return_value = Mock(status_code=200, text="", headers={},
+                                  json=Mock(return_value={'token': token, 'expires_at': int(time.time()) + 10000}))
+        self.client.post('/login', data={'email': 'e@a.tu', 'password': 'x'})
+
+        self.assertEqual(self.visit(token).status_code, 200)
+        validate.assert_not_called()